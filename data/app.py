@@ -2,31 +2,41 @@ import sys
 import os
 import pandas as pd
 import streamlit as st
-from textblob import TextBlob
-import nltk
 
 # --- 1. SYSTEM INITIALIZATION ---
-@st.cache_resource
-def setup_engine():
-    try:
-        nltk.download('punkt')
-        nltk.download('brown')
-        nltk.download('punkt_tab')
-    except:
-        pass
-setup_engine()
-
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_path = os.path.abspath(os.path.join(current_dir, '..'))
 if root_path not in sys.path:
     sys.path.insert(0, root_path)
 
 try:
-    from src.combined_data import create_combined_dataset
-    from src.hybrid_risk_model import train_hybrid_model
+    from src import instrumentation
+    from src.nlp_resources import ensure_nltk_data
+    from src.risk_pipeline import run_risk_pipeline, upload_hash
+    from src.visualization_dashboard import downsample
 except ImportError:
     st.error("System Error: Core architectural modules (src/) not found.")
 
+# NLTK corpora are only looked up locally (see src/nlp_resources.py), so a
+# cold start never waits on the network
+@st.cache_resource
+def setup_engine():
+    return ensure_nltk_data()
+missing_corpora = setup_engine()
+
+# Keyed on the upload hash only: repeat audits of the same files return from
+# the cache, and sessions never share files on disk
+@st.cache_data(show_spinner=False)
+def run_audit(upload_key, _r_text, _raw_df):
+    # Sentiment comes from the same sentence index as the per-sprint ambiguity
+    df = run_risk_pipeline(_r_text, _raw_df).fillna(0)
+    sentiment = df['sentiment'].mean() if len(df) else 0.0
+    return df, sentiment
+
+@st.cache_data(show_spinner=False)
+def chart_series(upload_key, _df):
+    return downsample(_df, 'sprint', ['overload_score', 'ambiguity_score'])
+
 # --- 2. ELITE BUSINESS UI THEME ---
 st.set_page_config(page_title="SentianRisk | Governance", layout="wide")
 st.markdown("""
@@ -81,6 +91,9 @@ with st.sidebar:
     spr_file = st.file_uploader("Operational Schema (.csv)", type=["csv"])
     st.markdown("---")
     execute = st.button("Initialize Audit")
+    show_performance = st.checkbox("Performance panel", value=False)
+    if missing_corpora:
+        st.caption(f"Offline NLTK data missing: {', '.join(missing_corpora)}")
 
 # --- 5. AUDIT & RECOVERY LOGIC ---
 if execute and req_file and spr_file:
@@ -100,17 +113,10 @@ if execute and req_file and spr_file:
                 </div>
             """, unsafe_allow_html=True)
         else:
-            with st.spinner("Executing Risk Induction..."):
-                os.makedirs(os.path.join(root_path, "data"), exist_ok=True)
-                raw_df.to_csv(os.path.join(root_path, "data", "sprint_tasks.csv"), index=False)
-                with open(os.path.join(root_path, "data", "requirements.txt"), "w") as f: f.write(r_text)
-                
-                create_combined_dataset()
-                train_hybrid_model()
-                df = pd.read_csv(os.path.join(root_path, "results", "combined_risk_data.csv"))
-                df = df.fillna(0)
+            with st.spinner("Executing Risk Induction..."), instrumentation.collect(enable=show_performance) as spans:
+                upload_key = upload_hash(req_file.getvalue(), spr_file.getvalue())
+                df, sentiment = run_audit(upload_key, r_text, raw_df)
                 avg_risk = df['overload_score'].mean() if 'overload_score' in df.columns else 0
-                sentiment = TextBlob(r_text).sentiment.polarity
 
             # KPI DASHBOARD
             k1, k2, k3, k4 = st.columns(4)
@@ -144,7 +150,17 @@ if execute and req_file and spr_file:
 
             st.markdown("</div>", unsafe_allow_html=True)
 
-            st.line_chart(df.set_index('sprint')[['overload_score', 'ambiguity_score']])
+            # LTTB-downsampled, so long histories chart as fast as short ones
+            chart = chart_series(upload_key, df)
+            st.line_chart(chart.set_index('sprint')[['overload_score', 'ambiguity_score']])
+
+            # OPTIONAL PERFORMANCE PANEL
+            if show_performance:
+                st.markdown("<h5 style='color:#ffffff; letter-spacing:2px;'>ENGINE PERFORMANCE</h5>", unsafe_allow_html=True)
+                if spans:
+                    st.dataframe(pd.DataFrame(instrumentation.span_table(spans)), use_container_width=True)
+                else:
+                    st.caption("Served from cache: no pipeline stages ran.")
 
     except Exception as e:
         st.error(f"Engine Failure: {str(e)}")
@@ -0,0 +1,32 @@
+import sys
+import time
+
+from requirement_analysis import analyze_requirement, analyze_requirements
+from synthetic_data import make_requirements
+
+# Compares the per-line path (one nlp() call per requirement) with the
+# batched nlp.pipe path used by run_ambiguity_analysis.py, and checks that
+# both return identical metrics.
+#
+# Usage: python benchmark_ambiguity.py [n_lines] [n_process]
+
+if __name__ == "__main__":
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_process = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    requirements = make_requirements(n_lines)
+
+    start = time.perf_counter()
+    per_line = [analyze_requirement(req) for req in requirements]
+    per_line_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = list(analyze_requirements(requirements, n_process=n_process))
+    batched_time = time.perf_counter() - start
+
+    if per_line != batched:
+        raise SystemExit("Batched metrics differ from the per-line path")
+
+    print(f"{n_lines} requirements")
+    print(f"per-line nlp():  {per_line_time:.2f}s")
+    print(f"nlp.pipe (n_process={n_process}): {batched_time:.2f}s")
+    print(f"speedup: {per_line_time / max(batched_time, 1e-9):.1f}x")
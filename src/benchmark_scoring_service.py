@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from nlp_resources import preload_nlp
+from scoring_service import MicroBatcher, ScoringService
+from synthetic_data import make_requirements
+
+# Load test for scoring_service.py: many concurrent clients each POST one
+# requirement at a time to /ambiguity. The service is started in-process
+# twice, once with micro-batching and once with --max-batch 1 (one nlp()
+# call per request, the per-request baseline), and throughput and latency
+# percentiles are compared. With --url an already running service is
+# tested instead.
+#
+# Usage: python benchmark_scoring_service.py [--requests 2000] [--concurrency 32]
+
+async def _post(reader, writer, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def load_test(host, port, requirements, concurrency):
+    latencies = []
+    statuses = {}
+    pending = iter(requirements)
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for text in pending:
+                start = time.perf_counter()
+                status = await _post(reader, writer, "/ambiguity", {"text": text})
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "statuses": statuses,
+    }
+
+async def run_in_process(requirements, concurrency, max_batch, max_wait_ms, queue_size):
+    batcher = MicroBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms, queue_size=queue_size)
+    service = ScoringService(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        result = await load_test("127.0.0.1", port, requirements, concurrency)
+        result["mean_batch_size"] = service.stats()["mean_batch_size"]
+        return result
+    finally:
+        server.close()
+        await server.wait_closed()
+        batch_task.cancel()
+        batcher.executor.shutdown()
+
+def _show(label, result):
+    print(f"{label:16s} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:.1f} ms  "
+          f"p99 {result['p99_ms']:.1f} ms  mean batch {result.get('mean_batch_size')}  "
+          f"statuses {result['statuses']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the scoring service.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--url", default=None, help="host:port of a running service to test instead")
+    args = parser.parse_args()
+
+    requirements = make_requirements(args.requests)
+    print(f"{args.requests} requests from {args.concurrency} concurrent clients")
+
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        _show("service", asyncio.run(load_test(host or "127.0.0.1", int(port), requirements, args.concurrency)))
+    else:
+        preload_nlp()
+        # Queue sized so that neither run sheds load
+        queue_size = args.concurrency * 2
+        baseline = asyncio.run(run_in_process(requirements, args.concurrency, 1, 0, queue_size))
+        batched = asyncio.run(run_in_process(requirements, args.concurrency, args.max_batch,
+                                             args.max_wait_ms, queue_size))
+        _show("per-request", baseline)
+        _show("micro-batched", batched)
+        print(f"throughput gain: {batched['throughput_rps'] / max(baseline['throughput_rps'], 1e-9):.1f}x")
@@ -0,0 +1,63 @@
+import sys
+import time
+
+import pandas as pd
+
+from sprint_analysis import compute_overload_metrics
+from synthetic_data import make_sprint_tasks
+
+# Checks the grouped compute_overload_metrics against the original
+# per-sprint loop on synthetic data and times both.
+#
+# Usage: python benchmark_sprint_analysis.py [n_rows] [n_sprints]
+
+def reference_overload_metrics(df):
+    # Original O(sprints x rows) implementation, kept as the oracle
+    results = []
+
+    for sprint in df['sprint'].unique():
+        sprint_df = df[df['sprint'] == sprint]
+        total_tasks = len(sprint_df)
+        incomplete_tasks = len(sprint_df[sprint_df['status'] != 'done'])
+        carry_over_rate = incomplete_tasks / total_tasks
+
+        tasks_per_dev = sprint_df.groupby('assignee').size().to_dict()
+        max_tasks = max(tasks_per_dev.values())
+
+        estimated_hours = sprint_df['estimated_hours'].sum()
+        actual_hours = sprint_df['actual_hours'].sum()
+        hours_ratio = actual_hours / max(estimated_hours, 1)
+
+        overload_score = 0.4*carry_over_rate + 0.3*(max_tasks/10) + 0.3*hours_ratio
+        overload_score = min(overload_score, 1.0)
+
+        results.append({
+            "sprint": sprint,
+            "carry_over_rate": round(carry_over_rate,2),
+            "max_tasks_per_dev": max_tasks,
+            "hours_ratio": round(hours_ratio,2),
+            "overload_score": round(overload_score,2)
+        })
+
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_sprints = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    df = make_sprint_tasks(n_rows, n_sprints)
+
+    start = time.perf_counter()
+    expected = reference_overload_metrics(df)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = compute_overload_metrics(df)
+    grouped_time = time.perf_counter() - start
+
+    # The trend columns have no counterpart in the original loop
+    pd.testing.assert_frame_equal(actual[expected.columns], expected)
+
+    print(f"{n_rows} tasks, {n_sprints} sprints: outputs identical")
+    print(f"per-sprint loop: {loop_time:.2f}s")
+    print(f"grouped pass:    {grouped_time:.2f}s")
+    print(f"speedup: {loop_time / max(grouped_time, 1e-9):.1f}x")
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+# Measures, each in a fresh interpreter, how long importing the pipeline
+# modules takes and how long the first requirement analysis takes (which
+# includes loading the spaCy model on first use).
+#
+# Usage: python benchmark_startup.py
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBES = {
+    "import risk_pipeline": "import risk_pipeline",
+    "import requirement_analysis": "import requirement_analysis",
+    "first analyze_requirement": (
+        "import requirement_analysis\n"
+        "start = time.perf_counter()\n"
+        "requirement_analysis.analyze_requirement('The system should be fast.')\n"
+    ),
+    "ensure_nltk_data": "import nlp_resources; nlp_resources.ensure_nltk_data()",
+}
+
+def measure(code):
+    # Times `code` after interpreter start-up; for probes that set `start`
+    # themselves only the part after that point is reported
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        + code +
+        "\nprint(json.dumps(time.perf_counter() - start))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=SRC_DIR,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    for name, code in PROBES.items():
+        try:
+            print(f"{name:28s} {measure(code):.3f}s")
+        except subprocess.CalledProcessError as e:
+            print(f"{name:28s} failed: {e.stderr.strip().splitlines()[-1]}")
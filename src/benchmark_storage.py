@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import storage
+from synthetic_data import make_sprint_tasks
+
+# Compares CSV and Parquet for a sprint task table: file size, load time and
+# the in-memory size of the loaded frame. Needs pyarrow.
+#
+# Usage: python benchmark_storage.py [n_rows]
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = make_sprint_tasks(n_rows, n_sprints=max(n_rows // 200, 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "sprint_tasks")
+        for fmt in ("csv", "parquet"):
+            path = storage.write_table(df, base, fmt)
+
+            start = time.perf_counter()
+            loaded = storage.read_table(base, fmt)
+            load_time = time.perf_counter() - start
+
+            pd.testing.assert_frame_equal(loaded.astype(df.dtypes.to_dict()), df, check_dtype=False)
+            print(f"{fmt:8s} file {os.path.getsize(path) / 1e6:7.1f} MB   "
+                  f"load {load_time:6.2f}s   in memory {frame_memory_mb(loaded):7.1f} MB")
@@ -0,0 +1,164 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from nlp_resources import preload_nlp, timings as nlp_timings
+from synthetic_data import make_requirements, make_sprint_tasks
+
+# Times and memory-profiles every pipeline stage on seeded synthetic data
+# at several sizes and saves the results as JSON, so runs from different
+# versions can be compared with --compare.
+#
+# Usage: python benchmark_suite.py [--sizes 1000 100000 ...] [--compare old.json]
+#
+# Each stage runs once untraced for wall time and once under tracemalloc for
+# peak Python-heap memory (NumPy and pandas buffers included). A stage that
+# cannot run here (e.g. no spaCy model installed) is recorded with its error.
+# The spaCy model is loaded before any stage is timed, so the NLP stages
+# measure parsing only; the load time is reported on its own.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "results", "benchmarks")
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+def sprints_for(n_rows):
+    return min(max(n_rows // 1_000, 10), 10_000)
+
+def assignees_for(n_rows):
+    return min(max(n_rows // 1_000, 5), 10_000)
+
+def _measure(stage, n_rows, fn):
+    record = {"stage": stage, "rows": n_rows}
+    try:
+        start = time.perf_counter()
+        fn()
+        record["seconds"] = round(time.perf_counter() - start, 4)
+
+        tracemalloc.start()
+        try:
+            fn()
+            record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+def run_stages(n_rows, n_requirements, workdir):
+    from requirement_analysis import analyze_requirement, analyze_requirements
+    from sprint_analysis import compute_overload_metrics
+    from combined_data import create_combined_dataset
+    from hybrid_risk_model import train_hybrid_model
+    from visualization_dashboard import risk_summary, recommendations
+    from storage import read_table
+
+    requirements = make_requirements(n_requirements)
+    tasks = make_sprint_tasks(n_rows, sprints_for(n_rows), assignees_for(n_rows))
+
+    # create_combined_dataset and train_hybrid_model work on data/ and
+    # results/ relative to the working directory
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    with open(os.path.join(workdir, "data", "requirements.txt"), "w", encoding="utf-8") as f:
+        f.writelines(requirements)
+    tasks.to_csv(os.path.join(workdir, "data", "sprint_tasks.csv"), index=False)
+
+    def dashboard_prep():
+        combined = read_table("results/combined_risk_data.csv")
+        risk_summary(combined)
+        recommendations(combined)
+
+    stages = [
+        ("analyze_requirement", n_requirements, lambda: [analyze_requirement(r) for r in requirements]),
+        ("analyze_requirements", n_requirements, lambda: list(analyze_requirements(requirements))),
+        ("compute_overload_metrics", n_rows, lambda: compute_overload_metrics(tasks)),
+        ("create_combined_dataset", n_rows, create_combined_dataset),
+        ("train_hybrid_model", n_rows, train_hybrid_model),
+        ("dashboard_prep", n_rows, dashboard_prep),
+    ]
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        records = []
+        for stage, rows, fn in stages:
+            record = _measure(stage, rows, fn)
+            records.append(record)
+            shown = f"{record['seconds']:.3f}s, peak {record['peak_mb']} MB" if "error" not in record else record["error"]
+            print(f"  {stage:26s} {rows:>9,d} rows  {shown}")
+        return records
+    finally:
+        os.chdir(cwd)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous):
+    old = {(r["stage"], r["rows"]): r for r in previous["results"] if "seconds" in r}
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('created')}):")
+    for r in current["results"]:
+        before = old.get((r["stage"], r["rows"]))
+        if before is None or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / max(before["seconds"], 1e-9)
+        flag = "  REGRESSION" if ratio > 1.2 else ""
+        print(f"  {r['stage']:26s} {r['rows']:>9,d} rows  {before['seconds']:.3f}s -> {r['seconds']:.3f}s "
+              f"({ratio:.2f}x){flag}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="task table sizes in rows (1e3 to 1e7)")
+    parser.add_argument("--max-requirements", type=int, default=10_000,
+                        help="cap on requirement lines (a tenth of the task rows otherwise)")
+    parser.add_argument("--output", default=None, help="JSON file to write")
+    parser.add_argument("--compare", default=None, help="earlier JSON result to compare with")
+    args = parser.parse_args()
+
+    try:
+        preload_nlp()
+        print(f"spaCy model loaded in {nlp_timings['spacy_model']:.2f}s (not part of any stage)")
+    except Exception as e:
+        # The NLP stages record the error themselves
+        print(f"spaCy model not loaded: {type(e).__name__}: {e}")
+
+    results = []
+    for n_rows in args.sizes:
+        n_requirements = min(max(n_rows // 10, 1), args.max_requirements)
+        print(f"{n_rows:,d} task rows, {sprints_for(n_rows):,d} sprints, "
+              f"{assignees_for(n_rows):,d} assignees, {n_requirements:,d} requirements")
+        with tempfile.TemporaryDirectory() as workdir:
+            results.extend(run_stages(n_rows, n_requirements, workdir))
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    report = {
+        "created": now.isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "nlp_load_seconds": round(nlp_timings["spacy_model"], 4) if "spacy_model" in nlp_timings else None,
+        "results": results,
+    }
+
+    output = args.output or os.path.join(BENCHMARK_DIR, f"benchmark-{now:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved at {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
@@ -1,44 +1,55 @@
-import pandas as pd
-import os
 
-def create_combined_dataset():
+try:
+    from .requirement_index import (DEFAULT_INDEX_FILE, RequirementIndex, read_requirement_links,
+                                    spec_sprint_metrics)
+    from .sprint_analysis import stream_sprint_data, DEFAULT_CHUNKSIZE
+    from .storage import write_table
+except ImportError:
+    from requirement_index import (DEFAULT_INDEX_FILE, RequirementIndex, read_requirement_links,
+                                   spec_sprint_metrics)
+    from sprint_analysis import stream_sprint_data, DEFAULT_CHUNKSIZE
+    from storage import write_table
 
-    # Read requirements text
-    with open("data/requirements.txt", "r", encoding="utf-8") as f:
-        text = f.read()
-
-    sentences = [s.strip() for s in text.split(".") if s.strip()]
+def combine_sprint_counts(sprint_counts, ambiguity, max_tasks=None):
 
-    # Simple ambiguity scoring (basic NLP logic)
-    ambiguous_words = [
-        "fast", "quick", "user-friendly", "efficient",
-        "optimize", "improve", "secure", "robust"
-    ]
+    # Overload = tasks per sprint normalized
+    if max_tasks is None:
+        max_tasks = sprint_counts["task_count"].max()
+    sprint_counts["overload_score"] = sprint_counts["task_count"] / max_tasks
 
-    ambiguity_score = 0
-    for sentence in sentences:
-        for word in ambiguous_words:
-            if word in sentence.lower():
-                ambiguity_score += 1
+    # Add the per-sprint columns of requirement_index.sprint_metrics
+    # (indexed by sprint) to each sprint
+    for col in ambiguity.columns:
+        sprint_counts[col] = sprint_counts["sprint"].map(ambiguity[col]).to_numpy()
 
-    if len(sentences) > 0:
-        ambiguity_score = ambiguity_score / len(sentences)
-    else:
-        ambiguity_score = 0
+    return sprint_counts
 
-    # Read sprint CSV
-    sprint_df = pd.read_csv("data/sprint_tasks.csv")
+def sprint_ambiguity(sprints, requirements_path="data/requirements.txt", tasks=None,
+                     index_path=DEFAULT_INDEX_FILE):
+    # Per-sprint ambiguity and sentiment of the requirements linked to each
+    # sprint (`tasks`: sprint and requirement_id columns, optional).
+    # Sentences parsed by earlier runs are reused from the index file, so
+    # only changed requirement lines reach spaCy.
+    with open(requirements_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    index = RequirementIndex.load(index_path)
+    metrics = spec_sprint_metrics(text, sprints, tasks, index)
+    if index.changed:
+        index.save(index_path)
+    return metrics
 
-    # Overload = tasks per sprint normalized
-    sprint_counts = sprint_df.groupby("sprint").size().reset_index(name="task_count")
+def create_combined_dataset(chunksize=DEFAULT_CHUNKSIZE, task_updates=False):
 
-    max_tasks = sprint_counts["task_count"].max()
-    sprint_counts["overload_score"] = sprint_counts["task_count"] / max_tasks
+    # Stream sprint CSV into per-sprint aggregates (see stream_sprint_data
+    # for `task_updates`)
+    sprint_stats = stream_sprint_data("data/sprint_tasks.csv", chunksize=chunksize, task_updates=task_updates)
+    sprint_counts = sprint_stats.task_counts()
 
-    # Add ambiguity score to each sprint
-    sprint_counts["ambiguity_score"] = ambiguity_score
+    # Ambiguity of the requirements mapped to each sprint
+    links = read_requirement_links("data/sprint_tasks.csv", chunksize, task_updates)
+    ambiguity = sprint_ambiguity(sprint_counts["sprint"], "data/requirements.txt", links)
+    sprint_counts = combine_sprint_counts(sprint_counts, ambiguity)
 
-    os.makedirs("results", exist_ok=True)
-    sprint_counts.to_csv("results/combined_risk_data.csv", index=False)
+    write_table(sprint_counts, "results/combined_risk_data.csv")
 
     return sprint_counts
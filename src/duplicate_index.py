@@ -0,0 +1,190 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .instrumentation import span
+except ImportError:
+    from instrumentation import span
+
+# Near-duplicate detection for requirement lines with MinHash and
+# locality-sensitive hashing (LSH).
+#
+# Each requirement (lower-cased, whitespace collapsed) is cut into
+# overlapping character shingles. It is summarised by NUM_PERM MinHash
+# values: the share of equal values between two signatures estimates the
+# Jaccard similarity of their shingle sets. The signature is split into
+# BANDS bands. Requirements that agree on a whole band land in the same
+# bucket and become candidates.
+#
+# Clusters are built leader-style. A new requirement joins the cluster of
+# the most similar representative among its candidates, if their estimated
+# similarity reaches THRESHOLD. Otherwise it becomes the representative of
+# a new cluster. Only representatives are stored in buckets. Every member
+# is therefore close to its representative, and long chains of small
+# edits cannot merge unrelated requirements. Only candidates are compared,
+# so building the index is roughly linear in the number of requirements
+# rather than quadratic.
+#
+# The index is persisted (results/duplicate_index.pkl), and the lines of a
+# new spec revision are inserted into it. Identical lines, after
+# normalisation, map to the same entry.
+
+DEFAULT_INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results",
+                                  "duplicate_index.pkl")
+INDEX_VERSION = 1
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity are very likely to share a bucket
+BANDS = 16
+THRESHOLD = 0.7
+
+# Requirements hashed per vectorized batch
+_BATCH = 512
+
+_FNV_PRIME = np.uint64(1099511628211)
+
+
+def normalise_for_shingles(text):
+    return " ".join(text.lower().split())
+
+def _shingle_hashes(encoded, k):
+    # 64-bit hashes of every k-byte window of each text, as one flat array
+    # plus the offset of each text's first window
+    padded = [e.ljust(k) for e in encoded]
+    counts = np.array([len(e) - k + 1 for e in padded])
+    data = np.frombuffer(b"".join(padded), dtype=np.uint8).astype(np.uint64)
+
+    n = len(data) - k + 1
+    hashes = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            hashes = (hashes ^ data[j:j + n]) * _FNV_PRIME
+
+    # Drop windows that straddle two texts
+    lengths = np.array([len(e) for e in padded])
+    text_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    keep = np.concatenate([np.arange(s, s + c) for s, c in zip(text_starts, counts)])
+    return hashes[keep], np.r_[0, np.cumsum(counts)[:-1]]
+
+
+class DuplicateIndex:
+    """Incremental MinHash-LSH index over requirement texts.
+
+    Entries are numbered in insertion order; `representative[i]` is the
+    entry id of the representative of entry i's cluster (i itself for a
+    representative). Existing assignments never change as entries are added.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD,
+                 shingle_size=SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.params = {"num_perm": num_perm, "bands": bands, "threshold": threshold,
+                       "shingle_size": shingle_size, "seed": seed}
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions: high 32 bits of (a*h + b) mod 2**64
+        self._a = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.representative = np.empty(0, dtype=np.int64)
+        self.size = 0
+        self.entries = {}
+        self.buckets = [{} for _ in range(bands)]
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_FILE, **params):
+        # The saved index if it was built with the same parameters, else a new one
+        index = cls(**params)
+        if os.path.exists(path):
+            saved = pd.read_pickle(path)
+            if saved.get("version") == INDEX_VERSION and saved["params"] == index.params:
+                index.signatures = saved["signatures"]
+                index.representative = saved["representative"]
+                index.size = saved["size"]
+                index.entries = saved["entries"]
+                index.buckets = saved["buckets"]
+        return index
+
+    def save(self, path=DEFAULT_INDEX_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            "version": INDEX_VERSION,
+            "params": self.params,
+            "signatures": self.signatures[:self.size],
+            "representative": self.representative[:self.size],
+            "size": self.size,
+            "entries": self.entries,
+            "buckets": self.buckets,
+        }
+        tmp_file = path + ".tmp"
+        pd.to_pickle(state, tmp_file)
+        os.replace(tmp_file, path)
+
+    def signatures_of(self, texts):
+        # MinHash signatures (len(texts) x num_perm) in one vectorized pass
+        encoded = [normalise_for_shingles(t).encode("utf-8") for t in texts]
+        hashes, starts = _shingle_hashes(encoded, self.params["shingle_size"])
+        with np.errstate(over="ignore"):
+            permuted = ((hashes[:, None] * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+        return np.minimum.reduceat(permuted, starts, axis=0)
+
+    def _grow(self, n):
+        if self.size + n > len(self.representative):
+            capacity = max(2 * len(self.representative), self.size + n, 1024)
+            signatures = np.empty((capacity, self.params["num_perm"]), dtype=np.uint32)
+            signatures[:self.size] = self.signatures[:self.size]
+            representative = np.empty(capacity, dtype=np.int64)
+            representative[:self.size] = self.representative[:self.size]
+            self.signatures, self.representative = signatures, representative
+
+    def _insert(self, signature):
+        entry = self.size
+        self.signatures[entry] = signature
+        self.size += 1
+
+        rows = self.params["num_perm"] // self.params["bands"]
+        keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(len(self.buckets))]
+        candidates = {c for buckets, key in zip(self.buckets, keys) for c in buckets.get(key, ())}
+
+        if candidates:
+            candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self.signatures[candidates] == signature).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= self.params["threshold"]:
+                self.representative[entry] = candidates[best]
+                return entry
+
+        self.representative[entry] = entry
+        for buckets, key in zip(self.buckets, keys):
+            buckets.setdefault(key, []).append(entry)
+        return entry
+
+    def add(self, texts):
+        # Inserts the texts not indexed yet; returns the entry id of each text
+        ids = []
+        with span("duplicates.index") as s:
+            for first in range(0, len(texts), _BATCH):
+                batch = texts[first:first + _BATCH]
+                keys = [hashlib.sha1(normalise_for_shingles(t).encode("utf-8")).digest() for t in batch]
+                new = [i for i, key in enumerate(keys) if key not in self.entries]
+                new = list({keys[i]: i for i in new}.values())
+                if new:
+                    signatures = self.signatures_of([batch[i] for i in new])
+                    self._grow(len(new))
+                    for i, signature in zip(new, signatures):
+                        self.entries[keys[i]] = self._insert(signature)
+                ids.extend(self.entries[key] for key in keys)
+            s.items = len(texts)
+        return ids
+
+    def clusters(self, texts):
+        # Cluster label per text: the position of the first text in `texts`
+        # belonging to the same cluster (a text without near-duplicates is
+        # labelled with its own position)
+        entries = self.add(texts)
+        _, first, inverse = np.unique(self.representative[entries], return_index=True, return_inverse=True)
+        return first[inverse]
@@ -1,22 +1,122 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-def train_hybrid_model():
+try:
+    from .instrumentation import span
+    from .risk_model import MODEL_FILE as TRAINED_MODEL_FILE, RiskModel, sprint_features
+    from .storage import read_table, table_exists, write_table
+except ImportError:
+    from instrumentation import span
+    from risk_model import MODEL_FILE as TRAINED_MODEL_FILE, RiskModel, sprint_features
+    from storage import read_table, table_exists, write_table
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_FILE = os.path.join(PROJECT_ROOT, "results", "hybrid_risk_model.json")
+
+# Hybrid scoring logic (rule-based ML style): weighted score, then a
+# sprint is High above the "High" threshold and Medium above "Medium".
+# Once a RiskModel has been trained on sprint outcomes (run_risk_model.py,
+# saved at results/hybrid_risk_model.pkl), risk levels and scores come from
+# it instead and these rules are only the fallback. The model's score is
+# P(High) + P(Medium) / 2, the weights the dashboards give the levels, so
+# scores and levels always come from the same source.
+DEFAULT_MODEL = {
+    "weights": {"ambiguity_score": 0.6, "overload_score": 0.4},
+    "thresholds": {"High": 0.7, "Medium": 0.4},
+}
+
+def save_model(model=DEFAULT_MODEL, path=MODEL_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    load_model.cache_clear()
+
+@lru_cache(maxsize=None)
+def load_model(path=MODEL_FILE):
+    # Read once per process; the built-in weights apply until one is saved
+    if not os.path.exists(path):
+        return DEFAULT_MODEL
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def score_risk(ambiguity_score, overload_score, model=None):
+    model = model or load_model()
+    weights = model["weights"]
+    ambiguity_score = np.asarray(ambiguity_score, dtype=float)
+    overload_score = np.asarray(overload_score, dtype=float)
+    return (ambiguity_score * weights["ambiguity_score"]) + (overload_score * weights["overload_score"])
+
+@lru_cache(maxsize=None)
+def load_trained_model(path=TRAINED_MODEL_FILE):
+    # Read once per process; None until a model has been trained
+    if not os.path.exists(path):
+        return None
+    return RiskModel.load(path)
 
-    df = pd.read_csv("results/combined_risk_data.csv")
+def model_risk(trained, features):
+    # Risk scores and levels of the rows of `features` from a trained
+    # RiskModel, with absent features imputed
+    proba = trained.predict_proba(features, impute_missing=True)
+    classes = list(trained.classes)
+    score = proba[:, classes.index("High")] + 0.5 * proba[:, classes.index("Medium")]
+    return score, np.asarray(classes)[proba.argmax(axis=1)]
 
-    # Hybrid scoring logic (rule-based ML style)
-    def classify(row):
-        score = (row["ambiguity_score"] * 0.6) + (row["overload_score"] * 0.4)
+def assess_risk(ambiguity_score, overload_score, model=None):
+    # Vectorized risk scores and High/Medium/Low bins for arrays of any
+    # length. Rules given as `model` are applied as is; otherwise the
+    # trained model is used when there is one, with its other features
+    # imputed.
+    trained = load_trained_model() if model is None else None
+    if trained is not None:
+        shape = np.shape(ambiguity_score)
+        features = pd.DataFrame({"ambiguity_score": np.ravel(ambiguity_score).astype(float),
+                                 "overload_score": np.ravel(overload_score).astype(float)})
+        score, levels = model_risk(trained, features)
+        return score.reshape(shape), levels.reshape(shape)
 
-        if score > 0.7:
-            return "High"
-        elif score > 0.4:
-            return "Medium"
+    model = model or load_model()
+    thresholds = model["thresholds"]
+    score = score_risk(ambiguity_score, overload_score, model)
+    return score, np.where(score > thresholds["High"], "High",
+                           np.where(score > thresholds["Medium"], "Medium", "Low"))
+
+def classify_risk(ambiguity_score, overload_score, model=None):
+    return assess_risk(ambiguity_score, overload_score, model)[1]
+
+def predict_risk(df, model=None, overload_report=None):
+    # Returns a copy of `df` with risk_score and risk_level columns. The
+    # trained model, if any, scores each sprint on its features, taken from
+    # the overload report's row when one is given (see
+    # risk_model.sprint_features).
+    with span("hybrid.predict_risk") as s:
+        df = df.copy()
+        trained = load_trained_model() if model is None else None
+        if trained is not None:
+            features = df if overload_report is None else sprint_features(df, overload_report)
+            score, levels = model_risk(trained, features)
         else:
-            return "Low"
+            score, levels = assess_risk(df["ambiguity_score"], df["overload_score"], model)
+        df["risk_score"] = np.round(score, 4)
+        df["risk_level"] = levels
+        s.items = len(df)
+    return df
+
+def train_hybrid_model(df=None):
+
+    # Score an in-memory frame, or round-trip the combined dataset on disk
+    if df is not None:
+        return predict_risk(df)
+
+    df = read_table("results/combined_risk_data.csv")
 
-    df["risk_level"] = df.apply(classify, axis=1)
+    # The trained model also reads the overload report's columns
+    report = read_table("results/overload_report.csv") if table_exists("results/overload_report.csv") else None
+    df = predict_risk(df, overload_report=report)
 
-    df.to_csv("results/combined_risk_data.csv", index=False)
+    write_table(df, "results/combined_risk_data.csv")
 
     return df
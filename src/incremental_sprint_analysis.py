@@ -0,0 +1,250 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .sprint_analysis import (PROJECT_ROOT, SPRINT_FILE, TASK_COLUMNS, TASK_ID_COLUMN, SprintAccumulator,
+                                  fold_task_rows)
+    from .combined_data import sprint_ambiguity, combine_sprint_counts
+    from .hybrid_risk_model import predict_risk
+    from .requirement_index import REQUIREMENT_COLUMN, SPRINT_COLUMNS
+    from .storage import read_table, write_table, table_exists, table_path
+    from .workload_index import add_trend_columns
+except ImportError:
+    from sprint_analysis import (PROJECT_ROOT, SPRINT_FILE, TASK_COLUMNS, TASK_ID_COLUMN, SprintAccumulator,
+                                 fold_task_rows)
+    from combined_data import sprint_ambiguity, combine_sprint_counts
+    from hybrid_risk_model import predict_risk
+    from requirement_index import REQUIREMENT_COLUMN, SPRINT_COLUMNS
+    from storage import read_table, write_table, table_exists, table_path
+    from workload_index import add_trend_columns
+
+# Incremental upkeep of overload_report.csv and combined_risk_data.csv for a
+# task export that only grows at the end. The state file keeps the per-sprint
+# aggregates, the latest row of every task and a high-water mark (byte offset
+# into the CSV), so a run only parses rows appended since the last one.
+#
+# A row whose task_id was seen before is an update of that task (e.g. a
+# status change): the task's previous row is retracted from the aggregates
+# and the new one counted instead, exactly as a full run with task updates
+# (--task-updates) counts it. This keeps the latest row of every task in a
+# compact sprint_analysis.TaskStore, so the state grows with the number of
+# tasks. If the already-processed part of the
+# file no longer matches (truncated or rewritten), the state is rebuilt from
+# scratch.
+#
+# A last line without a newline may still be being written and is left for
+# the next run, unless the state is built from scratch or the file has not
+# changed size since the last run. It is then read as the final row, as the
+# full readers do.
+#
+# Requirement links (the requirement_id column) are kept with the latest row
+# of every task. For rows without a task id, which are never updated, the
+# distinct (sprint, requirement_id) pairs seen so far are kept instead.
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "results")
+STATE_FILE = os.path.join(RESULTS_DIR, "overload_state.pkl")
+OVERLOAD_FILE = os.path.join(RESULTS_DIR, "overload_report.csv")
+COMBINED_FILE = os.path.join(RESULTS_DIR, "combined_risk_data.csv")
+REQUIREMENTS_FILE = os.path.join(PROJECT_ROOT, "data", "requirements.txt")
+INDEX_FILE = os.path.join(RESULTS_DIR, "requirement_index.pkl")
+
+STATE_VERSION = 5
+
+# Bytes of CSV parsed per block
+BLOCK_SIZE = 64 * 1024 * 1024
+
+# Bytes hashed at the start and just before the high-water mark
+_FINGERPRINT_BYTES = 4096
+
+
+def _fingerprint(path, offset):
+    with open(path, "rb") as f:
+        head = f.read(min(offset, _FINGERPRINT_BYTES))
+        f.seek(max(offset - _FINGERPRINT_BYTES, 0))
+        tail = f.read(min(offset, _FINGERPRINT_BYTES))
+    return hashlib.sha256(head + b"\0" + tail).hexdigest()
+
+def _empty_state(path):
+    return {
+        "version": STATE_VERSION,
+        "source": os.path.abspath(path),
+        "offset": 0,
+        "header": b"",
+        "fingerprint": None,
+        "size": None,
+        "accumulator": SprintAccumulator(),
+        "tasks": None,
+        "links": None,
+    }
+
+def load_state(path=SPRINT_FILE, state_file=STATE_FILE):
+    # Returns the saved state if it still describes a prefix of `path`
+    if not os.path.exists(state_file):
+        return _empty_state(path)
+
+    state = pd.read_pickle(state_file)
+    if state.get("version") != STATE_VERSION or state.get("source") != os.path.abspath(path):
+        return _empty_state(path)
+
+    offset = state["offset"]
+    if os.path.getsize(path) < offset or _fingerprint(path, offset) != state["fingerprint"]:
+        print("Sprint task file changed before the high-water mark, rebuilding")
+        return _empty_state(path)
+    return state
+
+def save_state(state, state_file=STATE_FILE):
+    tmp_file = state_file + ".tmp"
+    pd.to_pickle(state, tmp_file)
+    os.replace(tmp_file, state_file)
+
+def _read_new_rows(path, state, final=False):
+    # Yields DataFrames of complete rows after the high-water mark. A
+    # trailing line without a newline is taken as a row only when `final`;
+    # otherwise it may still be being written and is left for the next run.
+    with open(path, "rb") as f:
+        if state["offset"] == 0:
+            state["header"] = f.readline()
+            state["offset"] = len(state["header"])
+        f.seek(state["offset"])
+
+        pending = b""
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            data = pending + block
+            cut = data.rfind(b"\n") + 1
+            pending = data[cut:]
+            if cut == 0:
+                continue
+
+            state["offset"] += cut
+            frame = _parse_rows(state["header"], data[:cut])
+            if not frame.empty:
+                yield frame
+
+        if final and pending.strip():
+            state["offset"] += len(pending)
+            yield _parse_rows(state["header"], pending + b"\n")
+
+def _parse_rows(header, data):
+    return pd.read_csv(io.BytesIO(header + data),
+                       usecols=lambda col: col in TASK_COLUMNS + [TASK_ID_COLUMN, REQUIREMENT_COLUMN])
+
+def _apply_rows(state, frame):
+    # Folds one block of rows into the state, returns the sprints it touched
+    if REQUIREMENT_COLUMN in frame:
+        untracked = frame[frame[TASK_ID_COLUMN].isna()] if TASK_ID_COLUMN in frame else frame
+        pairs = untracked[["sprint", REQUIREMENT_COLUMN]].dropna()
+        links = state["links"]
+        state["links"] = (pairs if links is None else pd.concat([links, pairs])).drop_duplicates()
+
+    state["accumulator"], state["tasks"], previous = fold_task_rows(state["accumulator"], state["tasks"], frame)
+    affected = set(frame["sprint"])
+    if previous is not None:
+        affected.update(previous["sprint"])
+    return affected
+
+def update_state(path=SPRINT_FILE, state_file=STATE_FILE, rebuild=False):
+    # Processes rows appended since the last run. Returns the state and the
+    # set of affected sprints (None when the state was built from scratch).
+    state = _empty_state(path) if rebuild else load_state(path, state_file)
+    from_scratch = state["offset"] == 0
+    size = os.path.getsize(path)
+
+    affected = set()
+    for frame in _read_new_rows(path, state, final=from_scratch or size == state["size"]):
+        affected |= _apply_rows(state, frame)
+
+    state["size"] = size
+    state["fingerprint"] = _fingerprint(path, state["offset"])
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    save_state(state, state_file)
+    return state, (None if from_scratch else affected)
+
+def update_overload_report(accumulator, affected, report_file=OVERLOAD_FILE):
+    # Recomputes only the per-sprint rows of affected sprints; the trend
+    # columns reach back over earlier sprints and are refreshed for all rows
+    # from the workload index (cheap next to re-reading the task file)
+    if affected is None or not table_exists(report_file):
+        report = accumulator.overload_metrics()
+    else:
+        report = read_table(report_file)
+        fresh = accumulator.subset(list(affected)).overload_metrics(trends=False)
+        report = pd.concat([report[~report["sprint"].isin(affected)], fresh], ignore_index=True)
+        order = report["sprint"].map(accumulator.sprints["first_row"])
+        report = report.iloc[order.argsort(kind="stable")].reset_index(drop=True)
+        report = add_trend_columns(report, accumulator)
+
+    write_table(report, report_file)
+    return report
+
+def requirement_links(state):
+    # Task rows carrying the sprint -> requirement mapping, if any
+    links = [state["links"]]
+    tasks = state["tasks"]
+    if tasks is not None and REQUIREMENT_COLUMN in tasks.values:
+        links.append(tasks.distinct(["sprint", REQUIREMENT_COLUMN]))
+    links = [l for l in links if l is not None]
+    return pd.concat(links, ignore_index=True).drop_duplicates() if links else None
+
+def update_combined_dataset(accumulator, affected, combined_file=COMBINED_FILE,
+                            requirements_file=REQUIREMENTS_FILE, links=None, index_file=INDEX_FILE,
+                            overload_report=None):
+    # Rewrites only the rows of affected sprints in the combined dataset;
+    # every row changes when the busiest sprint's task count changes. The
+    # requirement figures come from the requirement index, which parses
+    # nothing unless the spec changed; rows whose figures moved (spec
+    # edited, requirements relinked) are rewritten as well. Risk levels are
+    # reassigned for all rows, as a trained model also reads the overload
+    # report's trend columns, which move for every sprint.
+    counts = accumulator.task_counts()
+    max_tasks = counts["task_count"].max()
+    ambiguity = sprint_ambiguity(counts["sprint"], requirements_file, links, index_file)
+
+    combined = None
+    if affected is not None and table_exists(combined_file):
+        combined = read_table(combined_file)
+        if "task_count" not in combined or any(c not in combined for c in SPRINT_COLUMNS) or combined.empty:
+            combined = None
+
+    if combined is None:
+        changed = counts
+        kept = None
+    else:
+        current = ambiguity.reindex(combined["sprint"])[SPRINT_COLUMNS].to_numpy(dtype=float)
+        moved = ~np.isclose(combined[SPRINT_COLUMNS].to_numpy(dtype=float), current).all(axis=1)
+        if combined["task_count"].max() == max_tasks:
+            stale = combined["sprint"].isin(affected) | moved
+            changed = counts[counts["sprint"].isin(combined["sprint"][stale]) | counts["sprint"].isin(affected)].copy()
+        else:
+            stale = pd.Series(True, index=combined.index)
+            changed = counts
+        kept = combined[~stale]
+
+    changed = combine_sprint_counts(changed, ambiguity, max_tasks=max_tasks)
+
+    combined = changed if kept is None else pd.concat([kept, changed], ignore_index=True)
+    combined = combined.sort_values("sprint", kind="stable").reset_index(drop=True)
+    combined = predict_risk(combined, overload_report=overload_report)
+    write_table(combined, combined_file)
+    return combined
+
+def run_incremental(path=SPRINT_FILE, rebuild=False):
+    state, affected = update_state(path, rebuild=rebuild)
+    accumulator = state["accumulator"]
+
+    if affected is None:
+        print("Sprint state rebuilt from the full task file")
+    else:
+        print(f"{len(affected)} sprint(s) affected by new task rows")
+
+    report = update_overload_report(accumulator, affected)
+    update_combined_dataset(accumulator, affected, links=requirement_links(state), overload_report=report)
+    print(f"Overload report saved at {table_path(OVERLOAD_FILE)}")
+    print(f"Combined risk data saved at {table_path(COMBINED_FILE)}")
+    return state
@@ -0,0 +1,219 @@
+import collections
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Lightweight per-stage instrumentation.
+#
+#     with span("sprint.overload_metrics") as s:
+#         ...
+#         s.items = len(df)
+#
+# Each span records wall time, CPU time, rows/sentences processed (`items`)
+# and, when memory tracking is on (RISK_PROFILE_MEMORY=1), peak traced
+# memory; nested spans report the peak since the outermost one started.
+# Spans are off unless RISK_PROFILE=1 is set or enable() is called; while
+# off, span() returns a shared no-op object, so instrumented code pays a
+# flag check per call. collect(enable=True) turns them on for the current
+# context only (e.g. one dashboard session), without touching other
+# threads or the process-wide `records`.
+# Records can be exported as JSON lines or in Prometheus text format.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+METRICS_DIR = os.path.join(PROJECT_ROOT, "results", "metrics")
+
+_enabled = os.environ.get("RISK_PROFILE", "") not in ("", "0")
+_track_memory = os.environ.get("RISK_PROFILE_MEMORY", "") not in ("", "0")
+
+# Finished spans of this process while enabled globally, oldest first; only
+# the most recent MAX_RECORDS are kept, so a long-lived process stays bounded
+MAX_RECORDS = 100_000
+records = collections.deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+
+# Lists collecting the spans of the current context, and whether spans are
+# on for this context alone (see collect())
+_collectors = contextvars.ContextVar("risk_span_collectors", default=())
+_context_enabled = contextvars.ContextVar("risk_span_enabled", default=False)
+
+
+def enable(track_memory=False):
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = track_memory
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled or _context_enabled.get()
+
+
+class _NullSpan:
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.items = None
+
+    def __enter__(self):
+        self._tracing = _track_memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {
+            "stage": self.name,
+            "wall_seconds": time.perf_counter() - self._wall,
+            "cpu_seconds": time.process_time() - self._cpu,
+            "items": self.items,
+            "peak_memory_bytes": None,
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else None,
+            "ok": exc_type is None,
+            "timestamp": time.time(),
+            **self.attrs,
+        }
+        if _track_memory:
+            record["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            if self._tracing:
+                tracemalloc.stop()
+
+        if _enabled:
+            with _records_lock:
+                records.append(record)
+        for collector in _collectors.get():
+            collector.append(record)
+        return False
+
+
+def span(name, **attrs):
+    if not (_enabled or _context_enabled.get()):
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+def instrumented(name):
+    # Decorator form of span(); the result's length is recorded as `items`
+    # when it has one
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (_enabled or _context_enabled.get()):
+                return fn(*args, **kwargs)
+            with span(name) as s:
+                result = fn(*args, **kwargs)
+                try:
+                    s.items = len(result)
+                except TypeError:
+                    pass
+                return result
+        return wrapper
+    return decorator
+
+@contextmanager
+def collect(enable=False):
+    # Gathers the spans finished inside the block (in this thread/context);
+    # with `enable`, spans are recorded inside it even while off globally
+    collected = []
+    token = _collectors.set(_collectors.get() + (collected,))
+    enabled_token = _context_enabled.set(True) if enable else None
+    try:
+        yield collected
+    finally:
+        if enabled_token is not None:
+            _context_enabled.reset(enabled_token)
+        _collectors.reset(token)
+
+def span_table(spans):
+    # Compact rows for display (e.g. the dashboards' performance panel)
+    return [{
+        "stage": r["stage"],
+        "wall_ms": round(r["wall_seconds"] * 1000, 1),
+        "cpu_ms": round(r["cpu_seconds"] * 1000, 1),
+        "items": r["items"],
+        "peak_mb": None if r["peak_memory_bytes"] is None else round(r["peak_memory_bytes"] / 1e6, 2),
+    } for r in spans]
+
+def clear():
+    with _records_lock:
+        records.clear()
+
+def export_json(path, spans=None):
+    # One JSON object per line
+    spans = records if spans is None else spans
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in spans:
+            f.write(json.dumps(record) + "\n")
+
+def _prometheus_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def export_prometheus(path, spans=None):
+    # Totals per stage, in Prometheus text exposition format
+    spans = records if spans is None else spans
+    totals = {}
+    for record in spans:
+        stage = totals.setdefault(record["stage"], {"count": 0, "wall": 0.0, "cpu": 0.0, "items": 0, "peak": 0})
+        stage["count"] += 1
+        stage["wall"] += record["wall_seconds"]
+        stage["cpu"] += record["cpu_seconds"]
+        stage["items"] += record["items"] or 0
+        stage["peak"] = max(stage["peak"], record["peak_memory_bytes"] or 0)
+
+    metrics = [
+        ("risk_stage_runs_total", "counter", "Number of times the stage ran", "count"),
+        ("risk_stage_wall_seconds_total", "counter", "Wall-clock time spent in the stage", "wall"),
+        ("risk_stage_cpu_seconds_total", "counter", "CPU time spent in the stage", "cpu"),
+        ("risk_stage_items_total", "counter", "Rows or sentences processed by the stage", "items"),
+        ("risk_stage_peak_memory_bytes", "gauge", "Peak traced memory during the stage", "peak"),
+    ]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stage, values in sorted(totals.items()):
+            lines.append(f'{metric}{{stage="{_prometheus_label(stage)}"}} {values[key]}')
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+def export_metrics(run_name, spans=None, directory=METRICS_DIR):
+    # Writes <run_name>.jsonl and <run_name>.prom when instrumentation is on
+    if not _enabled:
+        return None
+    export_json(os.path.join(directory, f"{run_name}.jsonl"), spans)
+    prom_file = os.path.join(directory, f"{run_name}.prom")
+    export_prometheus(prom_file, spans)
+    print(f"Stage metrics saved at {prom_file}")
+    return prom_file
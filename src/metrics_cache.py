@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+try:
+    from .instrumentation import span
+    from .nlp_resources import get_nlp
+    from .requirement_analysis import analyze_requirements
+    from .text_utils import DEFAULT_MATCHER
+except ImportError:
+    from instrumentation import span
+    from nlp_resources import get_nlp
+    from requirement_analysis import analyze_requirements
+    from text_utils import DEFAULT_MATCHER
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CACHE_FILE = os.path.join(PROJECT_ROOT, "results", "ambiguity_cache.sqlite")
+
+METRIC_COLUMNS = ["vague_ratio", "avg_sentence_length", "passive_voice_score", "missing_criteria"]
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+def normalise_requirement(text):
+    return " ".join(text.split())
+
+def cache_context():
+    # Anything that changes the metrics for a given text invalidates the key
+    import spacy
+    nlp = get_nlp()
+    context = {
+        "model": f"{nlp.meta.get('lang', '')}_{nlp.meta.get('name', '')}",
+        "model_version": nlp.meta.get("version", ""),
+        "spacy_version": spacy.__version__,
+        # The compiled pattern covers both the lexicon and how it matches
+        "vague_terms": DEFAULT_MATCHER.pattern.pattern,
+    }
+    return json.dumps(context, sort_keys=True)
+
+def requirement_key(text, context):
+    payload = context + "\0" + normalise_requirement(text)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MetricsCache:
+    """Persistent per-requirement metrics cache with LRU eviction.
+
+    Entries are keyed by requirement_key(); `max_entries` caps the table and
+    the least recently used rows are evicted first. `hits` and `misses`
+    count lookups made through this instance.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_entries=500_000):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            "key TEXT PRIMARY KEY, "
+            "vague_ratio REAL, avg_sentence_length REAL, "
+            "passive_voice_score REAL, missing_criteria INTEGER, "
+            "last_used INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS metrics_last_used ON metrics (last_used)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, {', '.join(METRIC_COLUMNS)} FROM metrics WHERE key IN ({placeholders})",
+                chunk,
+            )
+            for row in rows:
+                found[row[0]] = dict(zip(METRIC_COLUMNS, row[1:]))
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        if found:
+            now = time.time_ns()
+            self.conn.executemany(
+                "UPDATE metrics SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self.conn.commit()
+        return found
+
+    def put_many(self, entries):
+        now = time.time_ns()
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO metrics (key, {', '.join(METRIC_COLUMNS)}, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, *(m[c] for c in METRIC_COLUMNS), now) for key, m in entries.items()],
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM metrics").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM metrics WHERE key IN "
+                "(SELECT key FROM metrics ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def analyze_requirements_cached(texts, cache, batch_size=256, n_process=1):
+    # Returns metrics for every text in order; only requirements missing from
+    # the cache (or repeated within `texts`) are parsed by spaCy, once each.
+    texts = list(texts)
+    with span("nlp.cache_lookup") as s:
+        context = cache_context()
+        keys = [requirement_key(t, context) for t in texts]
+        found = cache.get_many(keys)
+        s.items = len(keys)
+
+    pending = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in pending:
+            pending[key] = normalise_requirement(text)
+
+    if pending:
+        parsed = analyze_requirements(pending.values(), batch_size=batch_size, n_process=n_process)
+        computed = dict(zip(pending.keys(), parsed))
+        with span("nlp.cache_store") as s:
+            cache.put_many(computed)
+            s.items = len(computed)
+        found.update(computed)
+
+    return [dict(found[key]) for key in keys]
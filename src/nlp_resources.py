@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+
+# Lazy, offline-only management of the NLP resources the pipeline needs.
+#
+# The spaCy model is loaded on first use rather than at import time, so
+# importing the analysis modules is cheap. preload_nlp() loads it up front,
+# e.g. in a parent process before forking workers, which then share it.
+# NLTK corpora (used through TextBlob) are only looked up locally: in the
+# default NLTK locations, $NLTK_DATA, or data/nltk_data in this repo. No
+# download is ever attempted; on an air-gapped node, copy in a directory
+# prepared elsewhere with
+#   python -m nltk.downloader -d data/nltk_data punkt punkt_tab brown
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SPACY_MODEL = os.environ.get("RISK_SPACY_MODEL", "en_core_web_sm")
+LOCAL_NLTK_DATA = os.environ.get("RISK_NLTK_DATA", os.path.join(PROJECT_ROOT, "data", "nltk_data"))
+
+# NLTK resources used by TextBlob, as (resource path, package name)
+NLTK_RESOURCES = [
+    ("tokenizers/punkt", "punkt"),
+    ("tokenizers/punkt_tab", "punkt_tab"),
+    ("corpora/brown", "brown"),
+]
+
+# Seconds spent loading each resource in this process
+timings = {}
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                start = time.perf_counter()
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+                timings["spacy_model"] = time.perf_counter() - start
+    return _nlp
+
+def preload_nlp():
+    # Loads the model now; call before forking so workers inherit it
+    return get_nlp()
+
+def nlp_loaded():
+    return _nlp is not None
+
+def ensure_nltk_data(local_dir=LOCAL_NLTK_DATA):
+    # Makes locally installed NLTK corpora visible and returns the names of
+    # any that are still missing. Never touches the network.
+    start = time.perf_counter()
+    import nltk
+
+    if local_dir and os.path.isdir(local_dir) and local_dir not in nltk.data.path:
+        nltk.data.path.insert(0, local_dir)
+
+    missing = []
+    for resource, package in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+
+    timings["nltk_data"] = time.perf_counter() - start
+    return missing
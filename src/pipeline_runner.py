@@ -0,0 +1,297 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    from .storage import table_path
+except ImportError:
+    from storage import table_path
+
+# Dependency-tracked runner for the batch stages. Each stage is one of the
+# run_* scripts with the files it reads and writes. A stage depends on
+# another when it reads one of its outputs, so the stages form a DAG.
+#
+# A stage's fingerprint is a hash of:
+#   - the contents of its input files,
+#   - the source of its script and of every module in src/ it imports,
+#     directly or indirectly,
+#   - its command-line arguments and the environment variables that change
+#     its output.
+# The fingerprint and the hashes of the outputs are recorded in
+# results/pipeline_state.json after a successful run. A stage is skipped
+# while its fingerprint is unchanged and its outputs are still the files it
+# wrote. A stage that runs invalidates everything downstream of it.
+#
+# File hashes are cached by (size, mtime), so when nothing changed a run
+# costs a few stat calls. Stages run as subprocesses, with independent
+# stages in parallel.
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SRC_DIR, ".."))
+STATE_FILE = os.path.join(PROJECT_ROOT, "results", "pipeline_state.json")
+STATE_VERSION = 1
+
+# Environment read by the stages that changes what they write
+STORAGE_ENV = ["RISK_STORAGE_FORMAT"]
+NLP_ENV = ["RISK_SPACY_MODEL", "RISK_NLTK_DATA"]
+
+
+class Stage:
+    """One pipeline step: a script in src/ and the files it reads and writes.
+
+    Paths are relative to the project root. Result tables are given with a
+    .csv name and resolved through storage.table_path, so they follow
+    RISK_STORAGE_FORMAT.
+    """
+
+    def __init__(self, name, script, inputs, outputs, args=(), env=()):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.env = list(env)
+
+    def output_paths(self):
+        return [table_path(p) if p.startswith("results/") and p.endswith(".csv") else p
+                for p in self.outputs]
+
+    def input_paths(self):
+        return [table_path(p) if p.startswith("results/") and p.endswith(".csv") else p
+                for p in self.inputs]
+
+
+STAGES = [
+    Stage("ambiguity", "run_ambiguity_analysis.py",
+          inputs=["data/requirements.txt"],
+          outputs=["results/ambiguity_report.csv"],
+          env=STORAGE_ENV + NLP_ENV),
+    Stage("overload", "run_sprint_analysis.py",
+          inputs=["data/sprint_tasks.csv"],
+          outputs=["results/overload_report.csv"],
+          env=STORAGE_ENV),
+    # create_combined_dataset() followed by train_hybrid_model(); risk levels
+    # come from the trained model when there is one
+    Stage("hybrid", "run_hybrid_model.py",
+          inputs=["data/requirements.txt", "data/sprint_tasks.csv", "results/overload_report.csv",
+                  "results/hybrid_risk_model.json", "results/hybrid_risk_model.pkl"],
+          outputs=["results/combined_risk_data.csv"],
+          env=STORAGE_ENV + NLP_ENV),
+]
+
+
+def _local_imports(script):
+    # Source files in src/ that `script` imports, directly or indirectly
+    seen = set()
+    pending = [script]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(SRC_DIR, name), "rb") as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                path = module.split(".")[0] + ".py"
+                if os.path.exists(os.path.join(SRC_DIR, path)):
+                    pending.append(path)
+    return sorted(seen)
+
+def dependencies(stages):
+    # Stage name -> names of the stages producing one of its inputs
+    producers = {path: stage.name for stage in stages for path in stage.output_paths()}
+    return {stage.name: sorted({producers[p] for p in stage.input_paths() if p in producers} - {stage.name})
+            for stage in stages}
+
+def topological_order(stages):
+    deps = dependencies(stages)
+    order, done = [], set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in path:
+            raise ValueError(f"pipeline stages form a cycle: {' -> '.join(path + [name])}")
+        for dep in deps[name]:
+            visit(dep, path + [name])
+        done.add(name)
+        order.append(name)
+
+    for stage in stages:
+        visit(stage.name, [])
+    return order
+
+
+class PipelineState:
+    """Fingerprints of the last successful run of every stage, and a cache
+    of file hashes keyed by (size, mtime) so unchanged files are not re-read.
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.stages = {}
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == STATE_VERSION:
+                self.stages = saved["stages"]
+                self.files = saved["files"]
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "stages": self.stages, "files": self.files}, f, indent=1)
+        os.replace(tmp_file, self.path)
+
+    def file_hash(self, path):
+        # sha256 of a file (None if missing), re-read only when its size or mtime changed
+        full_path = os.path.join(PROJECT_ROOT, path)
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            self.files.pop(path, None)
+            return None
+        cached = self.files.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def fingerprint(self, stage):
+        digest = hashlib.sha256()
+        parts = {
+            "inputs": {p: self.file_hash(p) for p in stage.input_paths()},
+            "code": {p: self.file_hash(os.path.join("src", p)) for p in _local_imports(stage.script)},
+            "args": stage.args,
+            "env": {name: os.environ.get(name) for name in stage.env},
+        }
+        digest.update(json.dumps(parts, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def outputs_current(self, stage):
+        recorded = self.stages.get(stage.name, {}).get("outputs", {})
+        return all(recorded.get(p) is not None and self.file_hash(p) == recorded[p]
+                   for p in stage.output_paths())
+
+    def is_current(self, stage, fingerprint):
+        return self.stages.get(stage.name, {}).get("fingerprint") == fingerprint and self.outputs_current(stage)
+
+    def record(self, stage, fingerprint):
+        self.stages[stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": {p: self.file_hash(p) for p in stage.output_paths()},
+        }
+
+
+def _run_stage(stage):
+    # Never raises: the exit status and output tail are returned instead
+    start = time.perf_counter()
+    command = [sys.executable, os.path.join(SRC_DIR, stage.script)] + stage.args
+    # The stages resolve data/ and results/ against the working directory
+    result = subprocess.run(command, cwd=PROJECT_ROOT, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    return {"stage": stage.name, "returncode": result.returncode,
+            "output": result.stdout, "seconds": round(time.perf_counter() - start, 3)}
+
+def run_pipeline(stages=STAGES, targets=None, force=(), dry_run=False, workers=None,
+                 state_path=STATE_FILE, log=print):
+    # Runs the stages that are out of date, in dependency order and in
+    # parallel where independent. `targets` limits the run to those stages
+    # and their upstream; `force` names stages run even when current
+    # (everything with force=True). Returns a status per stage: "current",
+    # "ran", "failed", "skipped" (an upstream stage failed) or "stale"
+    # (dry run).
+    by_name = {stage.name: stage for stage in stages}
+    deps = dependencies(stages)
+    order = topological_order(stages)
+    unknown = (set(targets or ()) | (set(force) if force is not True else set())) - set(by_name)
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    if targets:
+        selected, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(deps[name])
+        order = [name for name in order if name in selected]
+
+    state = PipelineState(state_path)
+
+    def is_current(name):
+        stage = by_name[name]
+        return not (force is True or name in force) and state.is_current(stage, state.fingerprint(stage))
+
+    # Downstream of a stale stage counts as stale until that stage has run
+    status = {}
+    for name in order:
+        upstream_stale = any(status.get(dep) == "stale" for dep in deps[name])
+        status[name] = "stale" if upstream_stale or not is_current(name) else "current"
+
+    for name in order:
+        if status[name] == "current":
+            log(f"{name}: up to date")
+        elif dry_run:
+            log(f"{name}: would run")
+    if dry_run:
+        state.save()
+        return status
+
+    waiting = [name for name in order if status[name] == "stale"]
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers or max(len(waiting), 1)) as pool:
+        while waiting or running:
+            for name in list(waiting):
+                if any(status.get(dep) in ("failed", "skipped") for dep in deps[name]):
+                    waiting.remove(name)
+                    status[name] = "skipped"
+                    log(f"{name}: skipped, upstream stage failed")
+                elif all(status.get(dep, "current") in ("current", "ran") for dep in deps[name]):
+                    waiting.remove(name)
+                    # Fingerprinted now that upstream outputs are final; an
+                    # upstream rerun that rewrote identical files changes nothing
+                    fingerprint = state.fingerprint(by_name[name])
+                    if not (force is True or name in force) and state.is_current(by_name[name], fingerprint):
+                        status[name] = "current"
+                        log(f"{name}: up to date")
+                        continue
+                    log(f"{name}: running {by_name[name].script}")
+                    running[pool.submit(_run_stage, by_name[name])] = (name, fingerprint)
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, fingerprint = running.pop(future)
+                run = future.result()
+                if run["returncode"] == 0:
+                    state.record(by_name[name], fingerprint)
+                    status[name] = "ran"
+                    log(f"{name}: done in {run['seconds']}s")
+                else:
+                    status[name] = "failed"
+                    tail = "\n".join(run["output"].strip().splitlines()[-10:])
+                    log(f"{name}: FAILED (exit {run['returncode']}) after {run['seconds']}s\n{tail}")
+                state.save()
+
+    state.save()
+    return status
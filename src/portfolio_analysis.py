@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import time
+import traceback
+
+import pandas as pd
+
+try:
+    from .combined_data import combine_sprint_counts
+    from .hybrid_risk_model import predict_risk
+    from .nlp_resources import preload_nlp
+    from .process_pool import map_resilient
+    from .requirement_index import (SPRINT_COLUMNS, ambiguity_report, read_requirement_links,
+                                    requirement_links, spec_metrics, sprint_metrics)
+    from .sprint_analysis import stream_sprint_data, DEFAULT_CHUNKSIZE
+    from .storage import write_csv_atomic, write_table
+except ImportError:
+    from combined_data import combine_sprint_counts
+    from hybrid_risk_model import predict_risk
+    from nlp_resources import preload_nlp
+    from process_pool import map_resilient
+    from requirement_index import (SPRINT_COLUMNS, ambiguity_report, read_requirement_links,
+                                   requirement_links, spec_metrics, sprint_metrics)
+    from sprint_analysis import stream_sprint_data, DEFAULT_CHUNKSIZE
+    from storage import write_csv_atomic, write_table
+
+# Batch analysis of many projects. Each project is a folder holding the same
+# inputs as data/ (requirements.txt and sprint_tasks.csv); its reports are
+# written to <output_dir>/<project>/ and its risk rows are collected into one
+# portfolio table.
+
+REQUIREMENTS_NAME = "requirements.txt"
+SPRINT_TASKS_NAME = "sprint_tasks.csv"
+PORTFOLIO_FILE = "portfolio_risk.csv"
+RUNS_FILE = "portfolio_runs.csv"
+
+
+def find_projects(projects_dir):
+    return sorted(
+        os.path.join(projects_dir, name)
+        for name in os.listdir(projects_dir)
+        if os.path.isfile(os.path.join(projects_dir, name, SPRINT_TASKS_NAME))
+    )
+
+def _init_worker():
+    # Loads the spaCy model once per worker process (a no-op when it was
+    # inherited from the parent); every project the worker handles reuses it
+    preload_nlp()
+
+def analyze_project(project_dir, output_dir, batch_size=256):
+    project = os.path.basename(os.path.normpath(project_dir))
+    project_output = os.path.join(output_dir, project)
+
+    requirements_file = os.path.join(project_dir, REQUIREMENTS_NAME)
+    text = ""
+    if os.path.exists(requirements_file):
+        with open(requirements_file, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    # One spaCy pass per requirement feeds both the ambiguity report and the
+    # per-sprint figures below
+    spec, metrics = spec_metrics(text, batch_size=batch_size)
+    write_table(ambiguity_report(text, metrics), os.path.join(project_output, "ambiguity_report.csv"))
+
+    sprint_file = os.path.join(project_dir, SPRINT_TASKS_NAME)
+    sprint_stats = stream_sprint_data(sprint_file)
+    overload = sprint_stats.overload_metrics()
+    write_table(overload, os.path.join(project_output, "overload_report.csv"))
+
+    # Same per-sprint requirement figures as create_combined_dataset
+    counts = sprint_stats.task_counts()
+    links = requirement_links(spec, read_requirement_links(sprint_file, DEFAULT_CHUNKSIZE))
+    ambiguity = sprint_metrics(metrics, links, counts["sprint"])
+    combined = combine_sprint_counts(counts, ambiguity)
+    combined = predict_risk(combined, overload_report=overload)
+    write_table(combined, os.path.join(project_output, "combined_risk_data.csv"))
+
+    return combined, len(spec)
+
+def _run_project(project_dir, output_dir):
+    # Never raises: failures are reported in the run record instead
+    project = os.path.basename(os.path.normpath(project_dir))
+    start = time.perf_counter()
+    try:
+        combined, n_requirements = analyze_project(project_dir, output_dir)
+        run = {"project": project, "status": "ok", "requirements": n_requirements,
+               "sprints": len(combined), "error": ""}
+    except Exception:
+        combined = None
+        run = {"project": project, "status": "failed", "requirements": 0,
+               "sprints": 0, "error": traceback.format_exc(limit=3).strip()}
+    run["seconds"] = round(time.perf_counter() - start, 3)
+    return run, combined
+
+def run_portfolio(projects_dir, output_dir, workers=None):
+    projects = find_projects(projects_dir)
+    runs = []
+    tables = []
+
+    # Forked workers share a model loaded once in the parent
+    if multiprocessing.get_start_method() == "fork":
+        preload_nlp()
+
+    # A worker that dies only fails its own project (see process_pool.py)
+    outcomes = map_resilient(_run_project, projects, args=(output_dir,), workers=workers,
+                             initializer=_init_worker)
+    for project_dir, result, error in outcomes:
+        project = os.path.basename(os.path.normpath(project_dir))
+        if error is None:
+            run, combined = result
+        else:
+            run, combined = {"project": project, "status": "failed", "requirements": 0,
+                             "sprints": 0, "error": error, "seconds": None}, None
+
+        runs.append(run)
+        if combined is not None:
+            tables.append(combined.assign(project=project))
+        timing = "worker died" if run["seconds"] is None else f"{run['seconds']}s"
+        print(f"[{len(runs)}/{len(projects)}] {project}: {run['status']} ({timing})")
+
+    runs_df = pd.DataFrame(runs, columns=["project", "status", "seconds", "requirements", "sprints", "error"])
+    runs_df = runs_df.sort_values("project").reset_index(drop=True)
+
+    if tables:
+        portfolio = pd.concat(tables, ignore_index=True)
+        portfolio = portfolio[["project"] + [c for c in portfolio.columns if c != "project"]]
+        portfolio = portfolio.sort_values(["project", "sprint"]).reset_index(drop=True)
+    else:
+        portfolio = pd.DataFrame(columns=["project", "sprint", "task_count", "overload_score"]
+                                 + SPRINT_COLUMNS + ["risk_score", "risk_level"])
+
+    write_table(portfolio, os.path.join(output_dir, PORTFOLIO_FILE))
+    write_csv_atomic(runs_df, os.path.join(output_dir, RUNS_FILE))
+    return portfolio, runs_df
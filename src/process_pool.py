@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Process-pool map that survives worker crashes. When a worker process dies
+# (out of memory, a native crash, os._exit), ProcessPoolExecutor marks the
+# whole pool broken and fails every pending and running call, including
+# those of healthy items.
+#
+# To keep that from spreading, at most `workers` items are submitted at a
+# time. When a pool breaks, only the items in flight can be the culprit.
+# Each of them is rerun alone in a fresh single-worker pool, so only the
+# item that really crashes is reported as such. Items not submitted yet
+# continue in a new pool.
+
+
+def map_resilient(fn, items, args=(), workers=None, initializer=None):
+    # Calls fn(item, *args) for every item and yields (item, result, error)
+    # as items finish, in completion order. `error` is None on success, else
+    # a description of why the call did not return (the worker died, or it
+    # raised).
+    workers = workers or os.cpu_count() or 1
+    queue = list(reversed(items))
+    suspects = []
+
+    while queue or suspects:
+        # Items that were running when a pool broke, one process each
+        for item in suspects:
+            with ProcessPoolExecutor(max_workers=1, initializer=initializer) as pool:
+                yield (item, *_outcome(pool.submit(fn, item, *args)))
+        suspects = []
+
+        if not queue:
+            break
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+            running = {}
+            while queue or running:
+                while queue and len(running) < workers:
+                    item = queue.pop()
+                    running[pool.submit(fn, item, *args)] = item
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    item = running.pop(future)
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        suspects.append(item)
+                        broken = True
+                    else:
+                        yield (item, *_outcome(future))
+                if broken:
+                    suspects.extend(running.values())
+                    break
+
+def _outcome(future):
+    try:
+        return future.result(), None
+    except BrokenProcessPool:
+        return None, "worker process died (out of memory or crashed)"
+    except Exception as e:
+        return None, repr(e)
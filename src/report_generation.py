@@ -0,0 +1,69 @@
+import os
+import time
+import traceback
+
+import pandas as pd
+
+try:
+    from .process_pool import map_resilient
+    from .storage import read_table, table_exists, write_csv_atomic
+    from .visualization_dashboard import render_report, report_figure
+except ImportError:
+    from process_pool import map_resilient
+    from storage import read_table, table_exists, write_csv_atomic
+    from visualization_dashboard import render_report, report_figure
+
+# Headless risk packs for many projects. Every project folder holding a
+# combined_risk_data table (as written by portfolio_analysis.py) gets a
+# report rendered to <output_dir>/<project>/. Projects are spread over a
+# process pool; each worker sets up the plot style and report figure once
+# and reuses them for every project it renders.
+
+COMBINED_NAME = "combined_risk_data.csv"
+REPORT_RUNS_FILE = "report_runs.csv"
+
+
+def find_report_inputs(portfolio_dir):
+    return sorted(
+        os.path.join(portfolio_dir, name)
+        for name in os.listdir(portfolio_dir)
+        if table_exists(os.path.join(portfolio_dir, name, COMBINED_NAME))
+    )
+
+def _init_worker():
+    report_figure()
+
+def _render_project(project_dir, output_dir, formats):
+    # Never raises: failures are reported in the run record instead
+    project = os.path.basename(os.path.normpath(project_dir))
+    start = time.perf_counter()
+    try:
+        combined = read_table(os.path.join(project_dir, COMBINED_NAME))
+        paths = render_report(combined, os.path.join(output_dir, project), formats, title=project)
+        run = {"project": project, "status": "ok", "sprints": len(combined), "files": len(paths), "error": ""}
+    except Exception:
+        run = {"project": project, "status": "failed", "sprints": 0, "files": 0,
+               "error": traceback.format_exc(limit=3).strip()}
+    run["seconds"] = round(time.perf_counter() - start, 3)
+    return run
+
+def render_reports(portfolio_dir, output_dir, formats=("png", "pdf"), workers=None):
+    projects = find_report_inputs(portfolio_dir)
+    runs = []
+
+    # A renderer that dies only fails its own project (see process_pool.py)
+    outcomes = map_resilient(_render_project, projects, args=(output_dir, tuple(formats)), workers=workers,
+                             initializer=_init_worker)
+    for project_dir, run, error in outcomes:
+        project = os.path.basename(os.path.normpath(project_dir))
+        if error is not None:
+            run = {"project": project, "status": "failed", "sprints": 0, "files": 0,
+                   "error": error, "seconds": None}
+        runs.append(run)
+        timing = "worker died" if run["seconds"] is None else f"{run['seconds']}s"
+        print(f"[{len(runs)}/{len(projects)}] {project}: {run['status']} ({timing})")
+
+    runs_df = pd.DataFrame(runs, columns=["project", "status", "seconds", "sprints", "files", "error"])
+    runs_df = runs_df.sort_values("project").reset_index(drop=True)
+    write_csv_atomic(runs_df, os.path.join(output_dir, REPORT_RUNS_FILE))
+    return runs_df
@@ -1,18 +1,37 @@
-import spacy
+import numpy as np
+import pandas as pd
 
-# Load English model
-nlp = spacy.load("en_core_web_sm")
+try:
+    from .instrumentation import span
+    from .nlp_resources import get_nlp
+    from .text_utils import VAGUE_TERMS, count_vague_terms
+except ImportError:
+    from instrumentation import span
+    from nlp_resources import get_nlp
+    from text_utils import VAGUE_TERMS, count_vague_terms
 
-VAGUE_WORDS = ["fast", "easy", "simple", "efficient", "user-friendly", "flexible"]
+def __getattr__(name):
+    # English model, loaded on first access rather than at import time
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def analyze_requirement(text):
-    doc = nlp(text)
+# Shared with combined_data through text_utils
+VAGUE_WORDS = VAGUE_TERMS
+
+# Pipeline components the metrics never read (entities, lemmas)
+UNUSED_PIPES = ["ner", "lemmatizer"]
+
+# Words that count as stated acceptance criteria
+CRITERIA_WORDS = ["shall", "must", "criteria", "acceptance"]
+
+def _doc_metrics(doc):
     words = [token.text.lower() for token in doc if token.is_alpha]
     sentences = list(doc.sents)
 
-    vague_count = sum(1 for w in words if w in VAGUE_WORDS)
+    vague_count = count_vague_terms(doc.text)
     passive_count = sum(1 for token in doc if token.dep_ == "auxpass")
-    has_criteria = any(w in words for w in ["shall", "must", "criteria", "acceptance"])
+    has_criteria = any(w in words for w in CRITERIA_WORDS)
 
     return {
         "vague_ratio": vague_count / max(len(words), 1),
@@ -21,9 +40,38 @@ def analyze_requirement(text):
         "missing_criteria": 0 if has_criteria else 1
     }
 
+def analyze_requirement(text):
+    return _doc_metrics(get_nlp()(text))
+
+def analyze_requirements(texts, batch_size=256, n_process=1):
+    # Bulk version of analyze_requirement: streams the texts through nlp.pipe
+    # with the unused components switched off. Yields one metrics dict per
+    # text, in input order, identical to calling analyze_requirement on each.
+    nlp = get_nlp()
+    disabled = [name for name in UNUSED_PIPES if name in nlp.pipe_names]
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disabled)
+    with span("nlp.parse") as s:
+        parsed = 0
+        for doc in docs:
+            yield _doc_metrics(doc)
+            parsed += 1
+        s.items = parsed
+
 def compute_ambiguity_score(metrics):
     score = (0.4 * metrics["vague_ratio"] +
              0.3 * metrics["avg_sentence_length"]/50 +
              0.2 * metrics["passive_voice_score"] +
              0.1 * metrics["missing_criteria"])
-    return min(score, 1.0)
+    # Element-wise for Series of metrics as well as for one dict
+    return np.minimum(score, 1.0)
+
+def build_ambiguity_report(requirements, all_metrics):
+    results = []
+    for req, metrics in zip(requirements, all_metrics):
+        score = compute_ambiguity_score(metrics)
+        results.append({
+            "requirement": req.strip(),
+            **metrics,
+            "ambiguity_score": round(score, 2)
+        })
+    return pd.DataFrame(results)
@@ -0,0 +1,270 @@
+import importlib.metadata
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .instrumentation import span
+    from .metrics_cache import METRIC_COLUMNS, cache_context, requirement_key
+    from .nlp_resources import get_nlp
+    from .requirement_analysis import CRITERIA_WORDS, UNUSED_PIPES, compute_ambiguity_score
+    from .sprint_analysis import TASK_ID_COLUMN, TaskStore
+    from .text_utils import count_vague_terms
+except ImportError:
+    from instrumentation import span
+    from metrics_cache import METRIC_COLUMNS, cache_context, requirement_key
+    from nlp_resources import get_nlp
+    from requirement_analysis import CRITERIA_WORDS, UNUSED_PIPES, compute_ambiguity_score
+    from sprint_analysis import TASK_ID_COLUMN, TaskStore
+    from text_utils import count_vague_terms
+
+# Sentence-level index of a requirements spec, and its mapping to sprints.
+#
+# Each requirement line is parsed by spaCy once. Every sentence is stored
+# with the counts the ambiguity metrics are made of (words, vague terms,
+# passive auxiliaries, acceptance-criteria words) and its TextBlob
+# polarity. Requirement and sprint figures are sums over these rows, taken
+# with vectorized grouping. The index is saved next to the results it feeds
+# (results/requirement_index.pkl), keyed by requirement text, so a new spec
+# revision only parses the lines that changed. A change on the sprint side,
+# such as new tasks or a new mapping, parses nothing.
+#
+# A requirement belongs to a sprint through either:
+#   - a tag in its line, e.g. "[sprint 3]" or "[sprints 3, 4]";
+#   - the requirement_id column of the task CSV, holding one or more
+#     requirement ids separated by ";".
+# A requirement's id is the label it starts with (e.g. "REQ-12:"), or else
+# its 1-based line number. Sprints without linked requirements get the
+# figures of the whole spec.
+
+# Relative to the working directory, like the data/ and results/ files the
+# combined dataset is built from, so every project keeps its own index
+DEFAULT_INDEX_FILE = os.path.join("results", "requirement_index.pkl")
+INDEX_VERSION = 1
+
+REQUIREMENT_COLUMN = "requirement_id"
+
+SENTENCE_COLUMNS = ["key", "sentence", "text", "words", "vague_terms", "passive", "criteria", "sentiment"]
+SPRINT_COLUMNS = ["requirement_count", "ambiguity_score", "requirement_ambiguity", "sentiment"]
+
+_ID_PATTERN = re.compile(r"^\s*([A-Za-z]+-\d+)\s*[:.)]?\s+")
+_TAG_PATTERN = re.compile(r"\[\s*sprints?\s*:?\s*([^\]]*)\]", re.IGNORECASE)
+_LIST_SEPARATOR = re.compile(r"[\s,;]+")
+
+
+def split_requirement(line, number):
+    # (id, sprint tags, text to analyse) of one line of the spec
+    match = _ID_PATTERN.match(line)
+    requirement_id = match.group(1) if match else str(number)
+    text = line[match.end():] if match else line
+    tags = [tag for found in _TAG_PATTERN.findall(text) for tag in _LIST_SEPARATOR.split(found) if tag]
+    return requirement_id, tags, " ".join(_TAG_PATTERN.sub(" ", text).split())
+
+def parse_spec(text):
+    # One row per non-blank line: id, sprint tags and cleaned text
+    rows = [split_requirement(line, number)
+            for number, line in enumerate(text.splitlines(), start=1) if line.strip()]
+    return pd.DataFrame(rows, columns=["requirement_id", "tags", "text"])
+
+def index_context():
+    # Anything that changes the per-sentence rows invalidates the index
+    try:
+        sentiment = importlib.metadata.version("textblob")
+    except importlib.metadata.PackageNotFoundError:
+        sentiment = None
+    return cache_context() + f"\0textblob={sentiment}"
+
+def _sentence_rows(texts, keys, batch_size=256, n_process=1):
+    from textblob import TextBlob
+
+    nlp = get_nlp()
+    disabled = [name for name in UNUSED_PIPES if name in nlp.pipe_names]
+    rows = []
+    for key, doc in zip(keys, nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disabled)):
+        for position, sent in enumerate(doc.sents):
+            words = [token.text.lower() for token in sent if token.is_alpha]
+            rows.append((
+                key, position, sent.text, len(words),
+                count_vague_terms(sent.text),
+                sum(1 for token in sent if token.dep_ == "auxpass"),
+                sum(1 for w in words if w in CRITERIA_WORDS),
+                TextBlob(sent.text).sentiment.polarity,
+            ))
+    return rows
+
+
+class RequirementIndex:
+    """Parsed sentences of requirement texts, keyed by requirement_key().
+
+    `sentences` has one row per sentence (SENTENCE_COLUMNS). Entries are
+    only valid for the spaCy model, vague-term lexicon and sentiment
+    analyzer recorded in `context`; an index loaded under another context
+    starts empty.
+    """
+
+    def __init__(self, context=None):
+        self.context = context or index_context()
+        self.sentences = pd.DataFrame(columns=SENTENCE_COLUMNS)
+        # Texts parsed by the last lookup, and whether it modified the index
+        self.parsed = 0
+        self.changed = False
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_FILE):
+        index = cls()
+        if os.path.exists(path):
+            saved = pd.read_pickle(path)
+            if saved.get("version") == INDEX_VERSION and saved["context"] == index.context:
+                index.sentences = saved["sentences"]
+        return index
+
+    def save(self, path=DEFAULT_INDEX_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_file = path + ".tmp"
+        pd.to_pickle({"version": INDEX_VERSION, "context": self.context, "sentences": self.sentences}, tmp_file)
+        os.replace(tmp_file, path)
+
+    def lookup(self, texts, batch_size=256, n_process=1, prune=True):
+        # Sentence rows of `texts`, with a `requirement` column giving the
+        # position of the text they belong to. Texts not indexed yet are
+        # parsed in one nlp.pipe pass; with `prune`, entries of texts no
+        # longer asked for are dropped.
+        keys = pd.Series([requirement_key(t, self.context) for t in texts], dtype=object)
+        with span("requirements.index") as s:
+            new = keys[~keys.isin(self.sentences["key"])].drop_duplicates()
+            if len(new):
+                rows = _sentence_rows([texts[i] for i in new.index], new.tolist(), batch_size, n_process)
+                parsed = pd.DataFrame(rows, columns=SENTENCE_COLUMNS)
+                self.sentences = parsed if self.sentences.empty else pd.concat([self.sentences, parsed],
+                                                                               ignore_index=True)
+            kept = self.sentences["key"].isin(keys)
+            if prune and not kept.all():
+                self.sentences = self.sentences[kept].reset_index(drop=True)
+            self.parsed = len(new)
+            self.changed = len(new) > 0 or (prune and not kept.all())
+            s.items = len(new)
+
+        positions = pd.DataFrame({"key": keys, "requirement": np.arange(len(keys))})
+        return positions.merge(self.sentences, on="key").sort_values(["requirement", "sentence"], kind="stable")
+
+
+def requirement_metrics(sentences, n_requirements):
+    # One row per requirement position with the ambiguity metrics of
+    # requirement_analysis, the ambiguity score and summed sentiment
+    counts = sentences.groupby("requirement")[["words", "vague_terms", "passive", "criteria", "sentiment"]].sum()
+    counts["sentences"] = sentences.groupby("requirement").size()
+    counts = counts.reindex(range(n_requirements), fill_value=0)
+
+    n_sentences = np.maximum(counts["sentences"], 1)
+    metrics = pd.DataFrame({
+        "sentences": counts["sentences"],
+        "vague_terms": counts["vague_terms"],
+        "vague_ratio": counts["vague_terms"] / np.maximum(counts["words"], 1),
+        "avg_sentence_length": counts["words"] / n_sentences,
+        "passive_voice_score": counts["passive"] / n_sentences,
+        "missing_criteria": (counts["criteria"] == 0).astype(int),
+        "sentiment_sum": counts["sentiment"].astype(float),
+    })
+    metrics["ambiguity_score"] = compute_ambiguity_score(metrics)
+    return metrics
+
+def requirement_links(spec, tasks=None):
+    # (sprint, requirement position) pairs from the spec's tags and the
+    # requirement_id column of `tasks`; sprints are compared as strings
+    tagged = spec["tags"].explode().dropna()
+    links = [pd.DataFrame({"sprint": tagged.astype(str).to_numpy(), "requirement": tagged.index.to_numpy()})]
+
+    if tasks is not None and REQUIREMENT_COLUMN in tasks:
+        mapped = tasks[["sprint", REQUIREMENT_COLUMN]].dropna().drop_duplicates()
+        ids = mapped[REQUIREMENT_COLUMN].astype(str).str.split(";").explode().str.strip()
+        positions = pd.Series(np.arange(len(spec)), index=spec["requirement_id"].astype(str))
+        positions = positions[~positions.index.duplicated()]
+        found = ids.map(positions).dropna()
+        links.append(pd.DataFrame({"sprint": mapped.loc[found.index, "sprint"].astype(str).to_numpy(),
+                                   "requirement": found.astype(int).to_numpy()}))
+
+    return pd.concat(links, ignore_index=True).drop_duplicates().reset_index(drop=True)
+
+def read_requirement_links(paths, chunksize, task_updates=False):
+    # Distinct (sprint, requirement_id) pairs of one or more task CSVs, read
+    # `chunksize` rows at a time (None when no file has the column). With
+    # `task_updates`, only the latest row of every task_id counts, as in
+    # sprint_analysis.stream_sprint_data.
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    pairs = []
+    tasks = TaskStore()
+    for path in paths:
+        header = pd.read_csv(path, nrows=0).columns
+        if REQUIREMENT_COLUMN not in header:
+            continue
+        tracked = task_updates and TASK_ID_COLUMN in header
+        columns = ["sprint", REQUIREMENT_COLUMN] + ([TASK_ID_COLUMN] if tracked else [])
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+            if TASK_ID_COLUMN in chunk:
+                identified = chunk[TASK_ID_COLUMN].notna()
+                tasks.put(chunk[identified].drop_duplicates(TASK_ID_COLUMN, keep="last"))
+                chunk = chunk[~identified]
+            pairs.append(chunk[["sprint", REQUIREMENT_COLUMN]].dropna().drop_duplicates())
+    if not pairs:
+        return None
+    pairs.append(tasks.distinct(["sprint", REQUIREMENT_COLUMN]))
+    return pd.concat(pairs, ignore_index=True).drop_duplicates()
+
+def _aggregate(linked):
+    return linked.groupby("sprint").agg(
+        requirement_count=("ambiguity_score", "size"),
+        vague_terms=("vague_terms", "sum"),
+        sentences=("sentences", "sum"),
+        requirement_ambiguity=("ambiguity_score", "mean"),
+        sentiment_sum=("sentiment_sum", "sum"),
+    )
+
+def sprint_metrics(metrics, links, sprints):
+    # Per-sprint figures (SPRINT_COLUMNS) indexed like `sprints`:
+    #   ambiguity_score        vague terms per sentence of the linked requirements
+    #   requirement_ambiguity  mean per-requirement ambiguity score
+    #   sentiment              mean sentence polarity
+    # Unlinked sprints get the whole spec's figures and a count of 0.
+    with span("requirements.sprint_metrics") as s:
+        linked = links.merge(metrics, left_on="requirement", right_index=True)
+        per_sprint = _aggregate(linked)
+        spec = _aggregate(metrics.assign(sprint="")).reindex([""], fill_value=0)
+        spec["requirement_count"] = 0
+
+        keys = pd.Index(sprints).astype(str)
+        result = per_sprint.reindex(keys).fillna(spec.iloc[0]).astype(float)
+
+        n_sentences = np.maximum(result["sentences"], 1)
+        result = pd.DataFrame({
+            "requirement_count": result["requirement_count"].astype(int).to_numpy(),
+            "ambiguity_score": (result["vague_terms"] / n_sentences).to_numpy(),
+            "requirement_ambiguity": result["requirement_ambiguity"].fillna(0).to_numpy(),
+            "sentiment": (result["sentiment_sum"] / n_sentences).to_numpy(),
+        }, index=pd.Index(sprints, name="sprint"))
+        s.items = len(result)
+    return result
+
+def spec_metrics(text, index=None, batch_size=256, n_process=1):
+    # Parsed spec (parse_spec) and its requirement_metrics; `index` (a
+    # RequirementIndex, default: a new in-memory one) holds the parsed
+    # sentences
+    index = index or RequirementIndex()
+    spec = parse_spec(text)
+    sentences = index.lookup(spec["text"].tolist(), batch_size=batch_size, n_process=n_process)
+    return spec, requirement_metrics(sentences, len(spec))
+
+def ambiguity_report(text, metrics):
+    # The columns of requirement_analysis.build_ambiguity_report, one row per
+    # non-blank line of the spec, taken from its requirement_metrics
+    report = metrics[METRIC_COLUMNS].reset_index(drop=True)
+    report.insert(0, "requirement", [line.strip() for line in text.splitlines() if line.strip()])
+    report["ambiguity_score"] = metrics["ambiguity_score"].round(2).to_numpy()
+    return report
+
+def spec_sprint_metrics(text, sprints, tasks=None, index=None, batch_size=256, n_process=1):
+    # Per-sprint figures for a spec's text (see spec_metrics for `index`)
+    spec, metrics = spec_metrics(text, index, batch_size, n_process)
+    return sprint_metrics(metrics, requirement_links(spec, tasks), sprints)
@@ -0,0 +1,251 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .instrumentation import span
+    from .sprint_analysis import DEFAULT_CHUNKSIZE
+except ImportError:
+    from instrumentation import span
+    from sprint_analysis import DEFAULT_CHUNKSIZE
+
+# Trainable sprint risk model: multinomial logistic regression over the
+# per-sprint features the pipeline already produces. The hand-set weights
+# in hybrid_risk_model.py, sprint_analysis.overload_score and
+# requirement_analysis.compute_ambiguity_score are replaced by weights
+# learned from observed sprint outcomes (High / Medium / Low).
+#
+# Training is incremental, so history far larger than memory can be
+# streamed through partial_fit one chunk at a time:
+#   - feature means and variances are merged chunk by chunk (Chan's
+#     parallel update) and used to standardise the features;
+#   - the weights take Adam steps over shuffled mini-batches of the chunk.
+# The optimizer state is saved with the weights, so training resumes where
+# it stopped when the next batch of outcomes arrives. Missing feature values
+# are imputed with the running mean.
+#
+# The model is a plain NumPy state pickled as a dict
+# (results/hybrid_risk_model.pkl) with a schema version. predict_proba
+# scores any number of sprints in one matrix product. Once saved, it takes
+# over from the hand-set rules in hybrid_risk_model.predict_risk and
+# assess_risk.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_FILE = os.path.join(PROJECT_ROOT, "results", "hybrid_risk_model.pkl")
+MODEL_VERSION = 2
+
+CLASSES = ["Low", "Medium", "High"]
+TARGET_COLUMN = "risk_outcome"
+
+# Ambiguity and sentiment of the requirements linked to each sprint (see
+# requirement_index.py) and the overload report's per-sprint and trend columns
+FEATURES = [
+    "ambiguity_score",
+    "requirement_ambiguity",
+    "sentiment",
+    "overload_score",
+    "carry_over_rate",
+    "max_tasks_per_dev",
+    "hours_ratio",
+    "carry_over_rate_rolling",
+    "hours_ratio_rolling",
+    "hours_ratio_ewma",
+    "max_dev_tasks_window",
+]
+
+
+class RiskModel:
+    """Online multinomial logistic regression from sprint features to risk level.
+
+    `partial_fit` may be called any number of times, on chunks of any size;
+    `predict_proba` returns one row per sprint and one column per entry of
+    `classes`.
+    """
+
+    def __init__(self, features=FEATURES, classes=CLASSES, learning_rate=0.01, l2=1e-4,
+                 batch_size=256, epochs=1, seed=0):
+        self.features = list(features)
+        self.classes = list(classes)
+        self.params = {"learning_rate": learning_rate, "l2": l2, "batch_size": batch_size,
+                       "epochs": epochs, "seed": seed}
+        n, k = len(self.features), len(self.classes)
+        # Running feature statistics (per feature, ignoring missing values)
+        self.count = np.zeros(n)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        # Weights on standardised features, and Adam moments for both
+        self.coef = np.zeros((n, k))
+        self.intercept = np.zeros(k)
+        self.moments = {name: np.zeros(shape) for name, shape in
+                        (("m_coef", (n, k)), ("v_coef", (n, k)), ("m_intercept", k), ("v_intercept", k))}
+        self.steps = 0
+        self.samples_seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        try:
+            state = pd.read_pickle(path)
+        except FileNotFoundError:
+            raise ValueError(f"no risk model at {path}; train one with run_risk_model.py train") from None
+        except (ImportError, AttributeError, pickle.UnpicklingError) as e:
+            raise ValueError(f"{path} is not a risk model saved by risk_model.py ({e})") from None
+        if not isinstance(state, dict) or state.get("version") != MODEL_VERSION:
+            raise ValueError(f"{path} is not a version {MODEL_VERSION} risk model; retrain it")
+        model = cls(state["features"], state["classes"], **state["params"])
+        for name in ("count", "mean", "m2", "coef", "intercept", "moments", "steps", "samples_seen"):
+            setattr(model, name, state[name])
+        model._rng = np.random.default_rng([model.params["seed"], model.steps])
+        return model
+
+    def save(self, path=MODEL_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            "version": MODEL_VERSION,
+            "features": self.features,
+            "classes": self.classes,
+            "params": self.params,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "coef": self.coef,
+            "intercept": self.intercept,
+            "moments": self.moments,
+            "steps": self.steps,
+            "samples_seen": self.samples_seen,
+        }
+        tmp_file = path + ".tmp"
+        pd.to_pickle(state, tmp_file)
+        os.replace(tmp_file, path)
+
+    def _matrix(self, df, impute_missing=False):
+        # With `impute_missing`, absent feature columns count as missing
+        # values (imputed with the running mean) instead of an error
+        missing = [f for f in self.features if f not in df]
+        if missing and not impute_missing:
+            raise ValueError(f"missing feature column(s): {', '.join(missing)}")
+        return df.reindex(columns=self.features).to_numpy(dtype=float)
+
+    def _labels(self, y):
+        codes = pd.Categorical(np.asarray(y, dtype=object), categories=self.classes).codes
+        if (codes < 0).any():
+            unknown = sorted(set(np.asarray(y, dtype=object)[codes < 0].astype(str)))
+            raise ValueError(f"unknown risk level(s): {', '.join(unknown)} (expected {self.classes})")
+        return codes
+
+    def _update_scaler(self, x):
+        present = ~np.isnan(x)
+        n = present.sum(axis=0)
+        chunk_mean = np.where(n > 0, np.nansum(x, axis=0) / np.maximum(n, 1), 0.0)
+        chunk_m2 = np.nansum(np.where(present, x - chunk_mean, 0.0) ** 2, axis=0)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(total > 0, self.mean + delta * n / total, 0.0)
+            self.m2 = np.where(total > 0, self.m2 + chunk_m2 + delta ** 2 * self.count * n / total, 0.0)
+        self.count = total
+
+    def _standardise(self, x):
+        std = np.sqrt(self.m2 / np.maximum(self.count, 1))
+        z = (x - self.mean) / np.where(std > 0, std, 1.0)
+        return np.nan_to_num(z, nan=0.0)
+
+    def _softmax(self, z):
+        logits = z @ self.coef + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def _adam_step(self, name, param, grad, lr, beta1=0.9, beta2=0.999, eps=1e-8):
+        m, v = self.moments["m_" + name], self.moments["v_" + name]
+        m *= beta1
+        m += (1 - beta1) * grad
+        v *= beta2
+        v += (1 - beta2) * grad ** 2
+        m_hat = m / (1 - beta1 ** self.steps)
+        v_hat = v / (1 - beta2 ** self.steps)
+        param -= lr * m_hat / (np.sqrt(v_hat) + eps)
+
+    def partial_fit(self, df, y=None):
+        # Trains on one chunk: feature columns of `df` and the observed risk
+        # levels `y` (default: df[TARGET_COLUMN]); rows without an outcome are skipped
+        y = df[TARGET_COLUMN] if y is None else y
+        labelled = pd.notna(np.asarray(y, dtype=object))
+        x = self._matrix(df)[labelled]
+        codes = self._labels(np.asarray(y, dtype=object)[labelled])
+        if len(x) == 0:
+            return self
+
+        with span("risk_model.partial_fit") as s:
+            self._update_scaler(x)
+            z = self._standardise(x)
+            onehot = np.eye(len(self.classes))[codes]
+            batch_size = self.params["batch_size"]
+            for _ in range(self.params["epochs"]):
+                order = self._rng.permutation(len(z))
+                for first in range(0, len(z), batch_size):
+                    rows = order[first:first + batch_size]
+                    error = (self._softmax(z[rows]) - onehot[rows]) / len(rows)
+                    self.steps += 1
+                    self._adam_step("coef", self.coef, z[rows].T @ error + self.params["l2"] * self.coef,
+                                    self.params["learning_rate"])
+                    self._adam_step("intercept", self.intercept, error.sum(axis=0), self.params["learning_rate"])
+            self.samples_seen += len(z)
+            s.items = len(z)
+        return self
+
+    def predict_proba(self, df, impute_missing=False):
+        # Class probabilities for every row of `df`, columns in `classes` order
+        with span("risk_model.predict_proba") as s:
+            proba = self._softmax(self._standardise(self._matrix(df, impute_missing)))
+            s.items = len(proba)
+        return proba
+
+    def predict(self, df, impute_missing=False):
+        return np.asarray(self.classes)[self.predict_proba(df, impute_missing).argmax(axis=1)]
+
+    def log_loss(self, df, y=None):
+        y = df[TARGET_COLUMN] if y is None else y
+        codes = self._labels(y)
+        proba = self.predict_proba(df)[np.arange(len(codes)), codes]
+        return float(-np.log(np.clip(proba, 1e-15, None)).mean())
+
+
+def iter_outcome_chunks(paths, features=FEATURES, target=TARGET_COLUMN, chunksize=DEFAULT_CHUNKSIZE):
+    # Feature and outcome columns of one or more history CSVs, `chunksize`
+    # rows at a time
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    columns = set(features) | {target}
+    for path in paths:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=lambda col: col in columns)
+
+def train_risk_model(paths, model=None, chunksize=DEFAULT_CHUNKSIZE, passes=1, holdout=None):
+    # Streams outcome history through `model` (a new RiskModel by default);
+    # returns the model and its log loss on `holdout` when one is given
+    model = model or RiskModel()
+    with span("risk_model.train") as s:
+        for _ in range(passes):
+            for chunk in iter_outcome_chunks(paths, model.features, chunksize=chunksize):
+                model.partial_fit(chunk)
+        s.items = model.samples_seen
+    loss = model.log_loss(holdout) if holdout is not None else None
+    return model, loss
+
+def score_portfolio(df, model):
+    # Copy of `df` with p_low / p_medium / p_high and the most likely level
+    proba = model.predict_proba(df)
+    df = df.copy()
+    for i, level in enumerate(model.classes):
+        df[f"p_{level.lower()}"] = np.round(proba[:, i], 4)
+    df["predicted_risk"] = np.asarray(model.classes)[proba.argmax(axis=1)]
+    return df
+
+def sprint_features(combined, overload_report):
+    # One row per sprint with every feature: the combined dataset's
+    # ambiguity score next to the overload report's columns
+    combined = combined.drop(columns=[c for c in overload_report.columns if c != "sprint"], errors="ignore")
+    return combined.merge(overload_report, on="sprint", how="left")
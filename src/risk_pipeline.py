@@ -0,0 +1,46 @@
+import hashlib
+
+try:
+    from .combined_data import combine_sprint_counts
+    from .hybrid_risk_model import predict_risk
+    from .instrumentation import span
+    from .requirement_index import spec_sprint_metrics
+    from .sprint_analysis import TASK_ID_COLUMN, SprintAccumulator, fold_task_rows
+except ImportError:
+    from combined_data import combine_sprint_counts
+    from hybrid_risk_model import predict_risk
+    from instrumentation import span
+    from requirement_index import spec_sprint_metrics
+    from sprint_analysis import TASK_ID_COLUMN, SprintAccumulator, fold_task_rows
+
+def run_risk_pipeline(requirements_text, sprint_df):
+    # In-memory equivalent of create_combined_dataset() followed by
+    # train_hybrid_model(): same columns, no files read or written, so
+    # concurrent sessions cannot see each other's uploads
+    with span("pipeline.run") as s:
+        with span("sprint.aggregate") as agg:
+            # A repeated task_id is an update of that task, as in the
+            # incremental updater; the upload is in memory anyway
+            accumulator, _, _ = fold_task_rows(SprintAccumulator(), None, sprint_df)
+            sprint_counts = accumulator.task_counts()
+            agg.items = len(sprint_df)
+
+        # Parsed in memory: the upload's requirements are indexed once per
+        # call, and linked through the latest row of every task
+        links = sprint_df
+        if TASK_ID_COLUMN in sprint_df:
+            ids = sprint_df[TASK_ID_COLUMN]
+            links = sprint_df[~(ids.duplicated(keep="last") & ids.notna())]
+        ambiguity = spec_sprint_metrics(requirements_text, sprint_counts["sprint"], links)
+        combined = combine_sprint_counts(sprint_counts, ambiguity)
+
+        combined = predict_risk(combined, overload_report=accumulator.overload_metrics())
+        s.items = len(sprint_df)
+    return combined
+
+def upload_hash(*uploads):
+    # Stable cache key for a set of uploaded files (raw bytes)
+    digest = hashlib.sha256()
+    for data in uploads:
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
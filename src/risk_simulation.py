@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .hybrid_risk_model import load_model, load_trained_model, model_risk, score_risk
+    from .instrumentation import span
+    from .sprint_analysis import overload_score
+except ImportError:
+    from hybrid_risk_model import load_model, load_trained_model, model_risk, score_risk
+    from instrumentation import span
+    from sprint_analysis import overload_score
+
+# Monte Carlo what-if analysis for planned sprints. Estimate error is fitted
+# per assignee from past tasks; a plan (one row per task: sprint, assignee,
+# estimated_hours) is then played out in many scenarios at once. Each
+# scenario draws every task's actual hours and whether it is left unfinished.
+# Each scenario is scored with the overload formula of sprint_analysis and,
+# like the pipeline's risk levels, with the trained risk model when there is
+# one (its other features imputed) or else the hybrid model's weights and
+# thresholds. The result is, per sprint, the probability of each risk level
+# and percentile bands.
+#
+# Scenarios are columns of NumPy arrays (tasks x scenarios), processed in
+# blocks that bound memory; nothing loops over scenarios in Python. The same
+# seed gives the same draws per task position, so a plan and its reassigned
+# variants are compared on common random numbers.
+
+DEFAULT_SCENARIOS = 20_000
+
+# Pseudo-tasks of team history mixed into every assignee's fit, so people
+# with few past tasks get the team's error distribution
+PRIOR_TASKS = 20
+
+# Percentiles reported as confidence bands
+BANDS = (5, 50, 95)
+
+# Task x scenario cells drawn per block
+_BLOCK_CELLS = 4_000_000
+
+
+class EstimateErrorModel:
+    """Per-assignee estimate-error distributions fitted from task history.
+
+    log(actual_hours / estimated_hours) of finished tasks is modelled as
+    normal per assignee (`mu`, `sigma`), and `incomplete_rate` is the share
+    of an assignee's tasks not done by sprint end. Both are shrunk toward the
+    team values by PRIOR_TASKS pseudo-tasks. Assignees without history get
+    the team values.
+    """
+
+    def __init__(self, assignees, team):
+        self.assignees = assignees
+        self.team = team
+
+    @classmethod
+    def fit(cls, tasks, prior_tasks=PRIOR_TASKS):
+        if "status" in tasks:
+            incomplete = (tasks["status"] != "done").to_numpy()
+        else:
+            incomplete = np.zeros(len(tasks), dtype=bool)
+        assignee = tasks["assignee"].astype(str).to_numpy()
+
+        # Only finished tasks with both hours recorded say anything about error
+        usable = (~incomplete & (tasks["estimated_hours"] > 0) & (tasks["actual_hours"] > 0)).to_numpy()
+        log_error = pd.Series(np.log(tasks["actual_hours"].to_numpy(dtype=float)[usable]
+                                     / tasks["estimated_hours"].to_numpy(dtype=float)[usable]))
+        if len(log_error) == 0:
+            raise ValueError("task history has no finished tasks with estimated and actual hours")
+
+        team = {
+            "mu": float(log_error.mean()),
+            "sigma": float(log_error.std(ddof=1)) if len(log_error) > 1 else 0.0,
+            "incomplete_rate": float(incomplete.mean()),
+        }
+
+        errors = log_error.groupby(assignee[usable])
+        n = errors.size()
+        means = errors.mean()
+        sq_dev = errors.var(ddof=1).fillna(0) * (n - 1)
+        weight = n / (n + prior_tasks)
+        stats = pd.DataFrame({
+            "mu": weight * means + (1 - weight) * team["mu"],
+            "sigma": np.sqrt((sq_dev + prior_tasks * team["sigma"] ** 2) / (n - 1 + prior_tasks)),
+        })
+
+        done = pd.Series(incomplete).groupby(assignee)
+        rate = (done.sum() + prior_tasks * team["incomplete_rate"]) / (done.size() + prior_tasks)
+        assignees = stats.reindex(rate.index)
+        assignees["mu"] = assignees["mu"].fillna(team["mu"])
+        assignees["sigma"] = assignees["sigma"].fillna(team["sigma"])
+        assignees["incomplete_rate"] = rate
+        assignees["tasks"] = done.size()
+        assignees.index.name = "assignee"
+        return cls(assignees, team)
+
+    def params(self, assignees):
+        # mu, sigma and incomplete_rate arrays aligned with `assignees`
+        stats = self.assignees.reindex(pd.Index(assignees).astype(str))
+        return tuple(stats[col].fillna(self.team[col]).to_numpy(dtype=float)
+                     for col in ("mu", "sigma", "incomplete_rate"))
+
+
+def reassign(plan, to_assignee, from_assignee=None, sprint=None, task_ids=None):
+    # Copy of `plan` with the selected tasks moved to `to_assignee`
+    selected = pd.Series(True, index=plan.index)
+    if from_assignee is not None:
+        selected &= plan["assignee"].astype(str) == str(from_assignee)
+    if sprint is not None:
+        selected &= plan["sprint"] == sprint
+    if task_ids is not None:
+        selected &= plan["task_id"].isin(task_ids)
+    plan = plan.copy()
+    plan["assignee"] = plan["assignee"].astype(str).where(~selected, str(to_assignee))
+    return plan
+
+def simulate_sprints(plan, error_model, ambiguity_score=0.0, n_scenarios=DEFAULT_SCENARIOS,
+                     seed=0, risk_model=None):
+    # Risk-level probabilities and percentile bands per planned sprint.
+    # `ambiguity_score` is one value or a Series indexed by sprint. Rules
+    # given as `risk_model` are applied as is (see hybrid_risk_model.assess_risk).
+    trained = load_trained_model() if risk_model is None else None
+    risk_model = risk_model or load_model()
+    thresholds = risk_model["thresholds"]
+
+    with span("simulation.run", scenarios=n_scenarios) as s:
+        plan = plan.sort_values("sprint", kind="stable")
+        codes, sprints = pd.factorize(plan["sprint"])
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        task_count = np.diff(np.r_[starts, len(plan)])
+
+        estimated = plan["estimated_hours"].to_numpy(dtype=float)
+        estimated_sum = np.maximum(np.add.reduceat(estimated, starts), 1)
+        max_tasks = (plan.groupby(["sprint", plan["assignee"].astype(str)], sort=False).size()
+                     .groupby(level=0, sort=False).max().reindex(sprints).to_numpy())
+        mu, sigma, incomplete_rate = error_model.params(plan["assignee"])
+        if isinstance(ambiguity_score, pd.Series):
+            ambiguity = ambiguity_score.reindex(sprints).fillna(0).to_numpy(dtype=float)
+        else:
+            ambiguity = np.full(len(sprints), float(ambiguity_score))
+
+        rng = np.random.default_rng(seed)
+        hours_ratio = np.empty((len(sprints), n_scenarios))
+        carry_over_rate = np.empty((len(sprints), n_scenarios))
+        overload = np.empty((len(sprints), n_scenarios))
+        block = max(_BLOCK_CELLS // max(len(plan), 1), 1)
+        for first in range(0, n_scenarios, block):
+            width = min(block, n_scenarios - first)
+            z = rng.standard_normal((len(plan), width))
+            actual = estimated[:, None] * np.exp(mu[:, None] + sigma[:, None] * z)
+            unfinished = rng.random((len(plan), width)) < incomplete_rate[:, None]
+
+            ratio = np.add.reduceat(actual, starts, axis=0) / estimated_sum[:, None]
+            carry_over = np.add.reduceat(unfinished, starts, axis=0, dtype=np.int64) / task_count[:, None]
+            hours_ratio[:, first:first + width] = ratio
+            carry_over_rate[:, first:first + width] = carry_over
+            overload[:, first:first + width] = overload_score(carry_over, max_tasks[:, None], ratio)
+
+        if trained is not None:
+            # One sprint's scenarios at a time bounds the feature matrix
+            risk = np.empty_like(overload)
+            high = np.empty(len(sprints))
+            medium = np.empty(len(sprints))
+            for i in range(len(sprints)):
+                features = pd.DataFrame({
+                    "ambiguity_score": ambiguity[i],
+                    "overload_score": overload[i],
+                    "carry_over_rate": carry_over_rate[i],
+                    "max_tasks_per_dev": max_tasks[i],
+                    "hours_ratio": hours_ratio[i],
+                })
+                risk[i], levels = model_risk(trained, features)
+                high[i] = (levels == "High").mean()
+                medium[i] = (levels == "Medium").mean()
+        else:
+            risk = score_risk(ambiguity[:, None], overload, risk_model)
+            high = (risk > thresholds["High"]).mean(axis=1)
+            medium = (risk > thresholds["Medium"]).mean(axis=1) - high
+        s.items = len(plan)
+
+        result = pd.DataFrame({
+            "sprint": sprints,
+            "task_count": task_count,
+            "max_tasks_per_dev": max_tasks,
+            "p_high": np.round(high, 3),
+            "p_medium": np.round(medium, 3),
+            "p_low": np.round(1 - high - medium, 3),
+        })
+        for name, values in (("overload", overload), ("hours_ratio", hours_ratio), ("risk_score", risk)):
+            for band, column in zip(BANDS, np.percentile(values, BANDS, axis=1)):
+                result[f"{name}_p{band}"] = np.round(column, 3)
+    return result
+
+def compare_plans(plans, error_model, ambiguity_score=0.0, n_scenarios=DEFAULT_SCENARIOS, seed=0):
+    # Simulates named variants of a plan (e.g. {"current": plan, "move dev3":
+    # reassign(plan, ...)}) on the same random draws, one row per plan and sprint
+    results = [simulate_sprints(plan, error_model, ambiguity_score, n_scenarios, seed).assign(plan=name)
+               for name, plan in plans.items()]
+    combined = pd.concat(results, ignore_index=True)
+    return combined[["plan"] + [c for c in combined.columns if c != "plan"]]
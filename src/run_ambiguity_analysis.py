@@ -1,24 +1,53 @@
-import pandas as pd
-from requirement_analysis import analyze_requirement, compute_ambiguity_score
+from requirement_analysis import build_ambiguity_report
+from metrics_cache import MetricsCache, analyze_requirements_cached
+from duplicate_index import DuplicateIndex
+from storage import write_table
+from instrumentation import export_metrics
 import os
+import sys
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 data_file = os.path.join(PROJECT_ROOT, "data", "requirements.txt")
 results_file = os.path.join(PROJECT_ROOT, "results", "ambiguity_report.csv")
+cache_file = os.path.join(PROJECT_ROOT, "results", "ambiguity_cache.sqlite")
+index_file = os.path.join(PROJECT_ROOT, "results", "duplicate_index.pkl")
+
+# nlp.pipe batch size and worker processes (see benchmark_ambiguity.py)
+BATCH_SIZE = 256
+N_PROCESS = 1
+
+# --representatives  parse one requirement per near-duplicate cluster and
+#                    report its metrics for the whole cluster
+REPRESENTATIVES_ONLY = "--representatives" in sys.argv
 
 with open(data_file, "r") as f:
     requirements = f.readlines()
 
-results = []
-for req in requirements:
-    metrics = analyze_requirement(req)
-    score = compute_ambiguity_score(metrics)
-    results.append({
-        "requirement": req.strip(),
-        **metrics,
-        "ambiguity_score": round(score, 2)
-    })
-
-df = pd.DataFrame(results)
-df.to_csv(results_file, index=False)
+# Near-duplicate clusters; lines of earlier spec revisions are already indexed
+index = DuplicateIndex.load(index_file)
+clusters = index.clusters(requirements)
+index.save(index_file)
+print(f"Duplicate index: {len(set(clusters))} clusters in {len(requirements)} requirements")
+
+if REPRESENTATIVES_ONLY:
+    parsed = [i for i, cluster in enumerate(clusters) if cluster == i]
+else:
+    parsed = list(range(len(requirements)))
+
+# Only requirements that are new or changed since the last run reach spaCy
+cache = MetricsCache(cache_file)
+parsed_metrics = analyze_requirements_cached([requirements[i] for i in parsed], cache,
+                                             batch_size=BATCH_SIZE, n_process=N_PROCESS)
+print(f"Metrics cache: {cache.hits} hits, {cache.misses} misses")
+cache.close()
+
+by_row = dict(zip(parsed, parsed_metrics))
+all_metrics = [by_row[cluster] for cluster in clusters] if REPRESENTATIVES_ONLY else parsed_metrics
+
+df = build_ambiguity_report(requirements, all_metrics)
+df["duplicate_cluster"] = clusters
+results_file = write_table(df, results_file)
 print(f"Ambiguity report generated at {results_file}")
+
+# Stage timings, when RISK_PROFILE=1
+export_metrics("ambiguity_analysis")
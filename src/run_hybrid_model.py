@@ -1,8 +1,22 @@
+import sys
+
 from combined_data import create_combined_dataset
 from hybrid_risk_model import train_hybrid_model
+from incremental_sprint_analysis import run_incremental
+from instrumentation import export_metrics
+
+# --incremental  only rescore sprints touched by newly appended task rows
+# --rebuild      rebuild the incremental state from the full task file
+# --task-updates count a repeated task_id as an update of that task, as the
+#                incremental mode does (memory then grows with the tasks)
+if "--incremental" in sys.argv or "--rebuild" in sys.argv:
+    run_incremental(rebuild="--rebuild" in sys.argv)
+else:
+    # Step 1: Prepare combined dataset
+    create_combined_dataset(task_updates="--task-updates" in sys.argv)
 
-# Step 1: Prepare combined dataset
-create_combined_dataset()
+    # Step 2: Train hybrid AI model
+    train_hybrid_model()
 
-# Step 2: Train hybrid AI model
-train_hybrid_model()
+# Stage timings, when RISK_PROFILE=1
+export_metrics("hybrid_model")
@@ -0,0 +1,28 @@
+import argparse
+import sys
+
+from pipeline_runner import run_pipeline, STAGES, STATE_FILE
+
+if __name__ == "__main__":
+    names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description="Run the analysis stages whose inputs, code or parameters changed.")
+    parser.add_argument("stages", nargs="*", choices=names + [[]], metavar="stage",
+                        help=f"stages to bring up to date, with their upstream (default: all of {', '.join(names)})")
+    parser.add_argument("--force", nargs="*", metavar="stage", default=None,
+                        help="rerun these stages even if current (all stages when none are named)")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages are out of date")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="stages run at the same time (default: all independent stages)")
+    parser.add_argument("--state", default=STATE_FILE, help="where fingerprints of past runs are kept")
+    args = parser.parse_args()
+
+    if args.force is None:
+        force = ()
+    else:
+        force = args.force or True
+    status = run_pipeline(targets=args.stages or None, force=force, dry_run=args.dry_run,
+                          workers=args.workers, state_path=args.state)
+
+    counts = {s: list(status.values()).count(s) for s in ("ran", "current", "failed", "skipped", "stale")}
+    print(", ".join(f"{n} {s}" for s, n in counts.items() if n))
+    sys.exit(1 if counts["failed"] or counts["skipped"] else 0)
@@ -0,0 +1,27 @@
+import argparse
+import os
+
+from portfolio_analysis import run_portfolio, PORTFOLIO_FILE, RUNS_FILE
+from storage import table_path
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score every project folder in a directory.")
+    parser.add_argument("projects_dir", help="directory with one folder per project "
+                                             "(requirements.txt, sprint_tasks.csv)")
+    parser.add_argument("--output", default=os.path.join(PROJECT_ROOT, "results", "portfolio"),
+                        help="where per-project reports and the portfolio table are written")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    portfolio, runs = run_portfolio(args.projects_dir, args.output, workers=args.workers)
+
+    failed = runs[runs["status"] != "ok"]
+    print(f"{len(runs) - len(failed)} of {len(runs)} projects scored, "
+          f"{runs['seconds'].sum():.1f}s of worker time")
+    for _, run in failed.iterrows():
+        print(f"FAILED {run['project']}: {run['error'].splitlines()[-1] if run['error'] else ''}")
+    print(f"Portfolio table saved at {table_path(os.path.join(args.output, PORTFOLIO_FILE))}")
+    print(f"Run log saved at {os.path.join(args.output, RUNS_FILE)}")
@@ -0,0 +1,53 @@
+import argparse
+import os
+
+from risk_model import RiskModel, MODEL_FILE, TARGET_COLUMN, score_portfolio, sprint_features, train_risk_model
+from sprint_analysis import DEFAULT_CHUNKSIZE
+from storage import read_table, write_table
+from instrumentation import export_metrics
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "results")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the sprint risk model on outcome history, or score sprints with it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="update the model with outcome history CSVs")
+    train.add_argument("history", nargs="+",
+                       help=f"CSVs with the feature columns and the observed level in {TARGET_COLUMN}")
+    train.add_argument("--model", default=MODEL_FILE, help="model file")
+    train.add_argument("--reset", action="store_true", help="start from an untrained model")
+    train.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows read per chunk")
+    train.add_argument("--passes", type=int, default=1, help="passes over the history")
+    train.add_argument("--holdout", default=None, help="labelled CSV to report log loss on")
+
+    score = commands.add_parser("score", help="risk probabilities for the current sprints")
+    score.add_argument("--model", default=MODEL_FILE, help="model file")
+    score.add_argument("--output", default=os.path.join(RESULTS_DIR, "risk_predictions.csv"))
+    args = parser.parse_args()
+
+    # Training starts from scratch when there is no model yet
+    model = None
+    try:
+        if args.command == "score" or (os.path.exists(args.model) and not args.reset):
+            model = RiskModel.load(args.model)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "train":
+        holdout = read_table(args.holdout) if args.holdout else None
+        model, loss = train_risk_model(args.history, model, chunksize=args.chunksize,
+                                       passes=args.passes, holdout=holdout)
+        model.save(args.model)
+        print(f"Model trained on {model.samples_seen} sprint outcomes, saved at {args.model}")
+        if loss is not None:
+            print(f"Holdout log loss: {loss:.4f}")
+    else:
+        features = sprint_features(read_table(os.path.join(RESULTS_DIR, "combined_risk_data.csv")),
+                                   read_table(os.path.join(RESULTS_DIR, "overload_report.csv")))
+        write_table(score_portfolio(features, model), args.output)
+        print(f"Risk probabilities for {len(features)} sprints saved at {args.output}")
+
+    # Stage timings, when RISK_PROFILE=1
+    export_metrics("risk_model")
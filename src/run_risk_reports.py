@@ -0,0 +1,26 @@
+import argparse
+import os
+
+from report_generation import render_reports, REPORT_RUNS_FILE
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render static risk reports for every scored project.")
+    parser.add_argument("portfolio_dir", nargs="?", default=os.path.join(PROJECT_ROOT, "results", "portfolio"),
+                        help="output of run_portfolio_analysis.py (one folder per project)")
+    parser.add_argument("--output", default=None, help="where reports are written (default: portfolio_dir)")
+    parser.add_argument("--formats", nargs="+", default=["png", "pdf"], help="file formats to render")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    output = args.output or args.portfolio_dir
+    runs = render_reports(args.portfolio_dir, output, formats=args.formats, workers=args.workers)
+
+    failed = runs[runs["status"] != "ok"]
+    print(f"{len(runs) - len(failed)} of {len(runs)} reports rendered, "
+          f"{runs['seconds'].sum():.1f}s of worker time")
+    for _, run in failed.iterrows():
+        print(f"FAILED {run['project']}: {run['error'].splitlines()[-1] if run['error'] else ''}")
+    print(f"Run log saved at {os.path.join(output, REPORT_RUNS_FILE)}")
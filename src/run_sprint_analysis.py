@@ -1,5 +1,22 @@
-from sprint_analysis import load_sprint_data, compute_overload_metrics, save_overload_report
+import sys
 
-df = load_sprint_data()
-results_df = compute_overload_metrics(df)
-save_overload_report(results_df)
+from sprint_analysis import stream_sprint_data, save_overload_report
+from incremental_sprint_analysis import run_incremental
+from instrumentation import export_metrics
+
+# --incremental  only process task rows appended since the last run
+# --rebuild      rebuild the incremental state from the full task file
+# --task-updates count a repeated task_id as an update of that task, as the
+#                incremental mode does (memory then grows with the tasks)
+if "--incremental" in sys.argv or "--rebuild" in sys.argv:
+    run_incremental(rebuild="--rebuild" in sys.argv)
+else:
+    # Task exports are folded chunk by chunk, so memory is bounded by the
+    # number of sprints and assignees rather than the number of rows
+    # (unless --task-updates is given)
+    sprint_stats = stream_sprint_data(task_updates="--task-updates" in sys.argv)
+    results_df = sprint_stats.overload_metrics()
+    save_overload_report(results_df)
+
+# Stage timings, when RISK_PROFILE=1
+export_metrics("sprint_analysis")
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-import os
+import io
 import numpy as np
 
-from src.combined_data import create_combined_dataset
-from src.hybrid_risk_model import train_hybrid_model
+from src.risk_pipeline import run_risk_pipeline, upload_hash
+from src.visualization_dashboard import (RISK_LEVELS, SPRINT_SORTS, downsample, filter_sprints,
+                                         risk_summary, sprint_page, sprint_table)
+from src.risk_simulation import EstimateErrorModel, compare_plans, reassign
+from src import instrumentation
 
 # ------------------------------------------------
 # PAGE CONFIG
@@ -38,11 +41,63 @@ h1, h2, h3 {
 </style>
 """, unsafe_allow_html=True)
 
+# ------------------------------------------------
+# CACHED ANALYSIS
+# ------------------------------------------------
+# Keyed on the upload hash only; repeat analyses of the same files are served
+# from the cache and nothing is written to disk
+@st.cache_data(show_spinner=False)
+def analyse_uploads(upload_key, _requirements_bytes, _sprint_bytes):
+    sprint_df = pd.read_csv(io.BytesIO(_sprint_bytes))
+    return run_risk_pipeline(_requirements_bytes.decode("utf-8"), sprint_df)
+
+# Aggregates derived from one analysis are cached under the same key, so
+# paging, filtering and sorting never recompute them, whatever the history
+# length
+@st.cache_data(show_spinner=False)
+def dashboard_summary(upload_key, _combined):
+    return risk_summary(_combined)
+
+@st.cache_data(show_spinner=False)
+def chart_series(upload_key, _combined):
+    return downsample(_combined, "sprint", ["ambiguity_score", "overload_score"])
+
+@st.cache_data(show_spinner=False)
+def sprint_view(upload_key, _combined, levels, sort):
+    return filter_sprints(sprint_table(_combined), levels, sort)
+
+# Task history for the what-if simulation: estimate-error fit once per
+# upload, simulations cached per sprint and reassignment
+@st.cache_data(show_spinner=False)
+def sprint_tasks(upload_key, _sprint_bytes):
+    return pd.read_csv(io.BytesIO(_sprint_bytes))
+
+@st.cache_data(show_spinner=False)
+def error_model(upload_key, _tasks):
+    return EstimateErrorModel.fit(_tasks)
+
+@st.cache_data(show_spinner=False)
+def what_if(upload_key, _tasks, _model, sprint, move_from, move_to, ambiguity_score):
+    plan = _tasks[_tasks["sprint"] == sprint]
+    plans = {"as planned": plan}
+    if move_from != NO_CHANGE and move_from != move_to:
+        plans[f"{move_from} → {move_to}"] = reassign(plan, move_to, from_assignee=move_from)
+    return compare_plans(plans, _model, ambiguity_score)
+
+NO_CHANGE = "(no change)"
+SIMULATION_COLUMNS = ["plan", "max_tasks_per_dev", "p_high", "p_medium", "p_low",
+                      "overload_p5", "overload_p50", "overload_p95", "risk_score_p5", "risk_score_p95"]
+
+PAGE_SIZES = [25, 50, 100, 250]
+SPRINT_COLUMNS = ["sprint", "task_count", "ambiguity_score", "overload_score", "risk_score",
+                  "risk_level", "recommendation"]
+
 # ------------------------------------------------
 # SIDEBAR
 # ------------------------------------------------
 st.sidebar.title("AI Risk Intelligence")
 menu = st.sidebar.radio("Navigation", ["Dashboard", "Architecture", "About"])
+show_performance = st.sidebar.checkbox("Performance panel", value=False)
 
 # ------------------------------------------------
 # ABOUT PAGE
@@ -103,34 +158,28 @@ with col2:
 
 if req_file and sprint_file:
 
-    if st.button("Run AI Risk Analysis", use_container_width=True):
-
-        os.makedirs("data", exist_ok=True)
-        os.makedirs("results", exist_ok=True)
+    req_bytes = req_file.getvalue()
+    sprint_bytes = sprint_file.getvalue()
+    upload_key = upload_hash(req_bytes, sprint_bytes)
 
-        with open("data/requirements.txt", "w") as f:
-            f.write(req_file.getvalue().decode("utf-8"))
-
-        sprint_df = pd.read_csv(sprint_file)
-        sprint_df.to_csv("data/sprint_tasks.csv", index=False)
+    # Filter and page widgets rerun the script, so the analysed upload is
+    # remembered for the session instead of relying on the button state
+    if st.button("Run AI Risk Analysis", use_container_width=True):
+        st.session_state["analysed_upload"] = upload_key
 
-        with st.spinner("Running AI Model..."):
-            create_combined_dataset()
-            train_hybrid_model()
+    if st.session_state.get("analysed_upload") == upload_key:
 
-        combined = pd.read_csv("results/combined_risk_data.csv")
+        with st.spinner("Running AI Model..."), instrumentation.collect(enable=show_performance) as spans:
+            combined = analyse_uploads(upload_key, req_bytes, sprint_bytes)
 
         # ------------------------------------------------
         # EXECUTIVE SUMMARY
         # ------------------------------------------------
         st.markdown("## Executive Summary")
 
-        high = (combined["risk_level"] == "High").sum()
-        medium = (combined["risk_level"] == "Medium").sum()
-        low = (combined["risk_level"] == "Low").sum()
-
-        total = len(combined)
-        risk_score = round((high*1 + medium*0.5) / total * 100, 2)
+        summary = dashboard_summary(upload_key, combined)
+        total, high, medium = summary["total"], summary["high"], summary["medium"]
+        risk_score = summary["risk_score"]
 
         colA, colB, colC, colD = st.columns(4)
 
@@ -148,11 +197,61 @@ if req_file and sprint_file:
 
         st.markdown("---")
 
+        # ------------------------------------------------
+        # PERFORMANCE
+        # ------------------------------------------------
+        if show_performance:
+            st.markdown("## Performance")
+            if spans:
+                st.dataframe(pd.DataFrame(instrumentation.span_table(spans)), use_container_width=True)
+            else:
+                st.caption("Served from cache: no pipeline stages ran.")
+            st.markdown("---")
+
         # ------------------------------------------------
         # DETAILED SPRINT VIEW
         # ------------------------------------------------
         st.markdown("## Sprint-Level Risk Analysis")
 
-        for _, row in combined.iterrows():
-            st.markdown(f"### Sprint {row['sprint']}")
-            colX
+        st.line_chart(chart_series(upload_key, combined).set_index("sprint")[["ambiguity_score", "overload_score"]])
+
+        colF, colS, colP = st.columns([2, 2, 1])
+        levels = colF.multiselect("Risk level", RISK_LEVELS, default=RISK_LEVELS)
+        sort = colS.selectbox("Sort by", list(SPRINT_SORTS))
+        page_size = colP.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+        view = sprint_view(upload_key, combined, tuple(levels), sort)
+        _, pages = sprint_page(view, 1, page_size)
+        # Keyed on the view, so changing a filter goes back to page 1
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1,
+                               key=f"sprint_page:{levels}:{sort}:{page_size}")
+        rows, _ = sprint_page(view, int(page), page_size)
+
+        st.caption(f"{len(view)} of {total} sprints match · page {int(page)} of {pages}")
+        st.dataframe(rows[SPRINT_COLUMNS], use_container_width=True, hide_index=True)
+
+        # ------------------------------------------------
+        # WHAT-IF SIMULATION
+        # ------------------------------------------------
+        st.markdown("## What-if Simulation")
+        st.caption("Risk-level probabilities over 20,000 scenarios drawn from each assignee's "
+                   "historical estimate error and carry-over rate.")
+
+        tasks = sprint_tasks(upload_key, sprint_bytes)
+        try:
+            model = error_model(upload_key, tasks)
+        except (KeyError, ValueError) as e:
+            st.info(f"Simulation unavailable for this upload: {e}")
+        else:
+            sprints = sorted(tasks["sprint"].unique())
+            people = sorted(tasks["assignee"].astype(str).unique())
+            colW, colM, colT = st.columns(3)
+            sim_sprint = colW.selectbox("Sprint", sprints, index=len(sprints) - 1)
+            move_from = colM.selectbox("Move tasks from", [NO_CHANGE] + people)
+            move_to = colT.selectbox("To", people)
+
+            # Scored with the ambiguity of the requirements linked to this sprint
+            ambiguity = combined.set_index("sprint")["ambiguity_score"]
+            sim = what_if(upload_key, tasks, model, sim_sprint, move_from, move_to,
+                          float(ambiguity.get(sim_sprint, ambiguity.mean())))
+            st.dataframe(sim[SIMULATION_COLUMNS], use_container_width=True, hide_index=True)
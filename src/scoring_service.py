@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import collections
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from hybrid_risk_model import assess_risk
+from nlp_resources import preload_nlp
+from requirement_analysis import analyze_requirements, compute_ambiguity_score
+
+# Local scoring service for editor integrations, on plain asyncio (no web
+# framework needed).
+#
+#   POST /ambiguity  {"text": "..."} or {"texts": ["...", ...]}
+#   POST /risk       {"rows": [{"ambiguity_score": .., "overload_score": ..}, ...]}
+#   GET  /stats      latency percentiles, batching and queue figures
+#   GET  /health
+#
+# /risk scores and levels come from the trained risk model when there is
+# one, as in the pipeline (see hybrid_risk_model.assess_risk).
+#
+# Requirement texts from concurrent requests are queued and parsed together:
+# the batcher waits at most --max-wait-ms after the first queued text, or
+# until --max-batch texts are waiting, then runs one nlp.pipe call for all
+# of them on a single worker thread. The queue is bounded; when it is full
+# new requests get 503 straight away instead of piling up. A request with
+# more texts than the whole queue holds could never be accepted, so it gets
+# 413 instead of a 503 that retrying would not cure.
+#
+# Usage: python scoring_service.py [--port 8765] [--max-batch 64] [--max-wait-ms 5]
+
+MAX_BODY_BYTES = 1024 * 1024
+LATENCY_WINDOW = 10_000
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            503: "Service Unavailable"}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class TooManyTexts(Exception):
+    pass
+
+
+class MicroBatcher:
+    """Collects texts from concurrent callers into nlp.pipe batches."""
+
+    def __init__(self, max_batch=64, max_wait_ms=5.0, queue_size=1024):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp")
+        self.batches = 0
+        self.batched_texts = 0
+
+    async def analyze(self, texts):
+        # Returns one metrics dict per text; raises QueueFull under overload
+        # and TooManyTexts when `texts` would not fit even an empty queue
+        if len(texts) > self.queue.maxsize > 0:
+            raise TooManyTexts(f"at most {self.queue.maxsize} texts per request")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            try:
+                self.queue.put_nowait((text, future))
+            except asyncio.QueueFull:
+                for queued in futures:
+                    queued.cancel()
+                raise QueueFull()
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, lambda: list(analyze_requirements(texts, batch_size=len(texts))))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_texts += len(batch)
+            for (_, future), metrics in zip(batch, results):
+                if not future.done():
+                    future.set_result(metrics)
+
+
+class ScoringService:
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.rejected = 0
+        self.started = time.time()
+
+    async def ambiguity(self, body):
+        texts = body["texts"] if "texts" in body else [body["text"]]
+        if not all(isinstance(t, str) for t in texts):
+            raise ValueError("texts must be strings")
+        all_metrics = await self.batcher.analyze(texts)
+        results = [{**m, "ambiguity_score": round(compute_ambiguity_score(m), 2)} for m in all_metrics]
+        return {"results": results} if "texts" in body else results[0]
+
+    async def risk(self, body):
+        rows = body["rows"]
+        ambiguity = np.array([r["ambiguity_score"] for r in rows], dtype=float)
+        overload = np.array([r["overload_score"] for r in rows], dtype=float)
+        scores, levels = assess_risk(ambiguity, overload)
+        return {"results": [{"score": round(float(s), 4), "risk_level": str(l)} for s, l in zip(scores, levels)]}
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        batches = self.batcher.batches
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+            "batches": batches,
+            "mean_batch_size": round(self.batcher.batched_texts / batches, 2) if batches else None,
+            "queue_depth": self.batcher.queue.qsize(),
+            "queue_capacity": self.batcher.queue.maxsize,
+        }
+
+    async def dispatch(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path in ("/ambiguity", "/risk"):
+            start = time.perf_counter()
+            try:
+                payload = json.loads(body or b"{}")
+                handler = self.ambiguity if path == "/ambiguity" else self.risk
+                result = await handler(payload)
+            except QueueFull:
+                self.rejected += 1
+                return 503, {"error": "scoring queue is full, retry later"}
+            except TooManyTexts as e:
+                return 413, {"error": str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                return 400, {"error": f"bad request: {e}"}
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - start)
+            return 200, result
+        return 404, {"error": "not found"}
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, result = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, result = await self.dispatch(method, path.split("?", 1)[0], body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                payload = json.dumps(result).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host="127.0.0.1", port=8765, max_batch=64, max_wait_ms=5.0, queue_size=1024):
+    batcher = MicroBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms, queue_size=queue_size)
+    service = ScoringService(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Scoring service listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local requirement and sprint risk scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=64, help="most texts per nlp.pipe call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="how long the first queued text waits for others")
+    parser.add_argument("--queue-size", type=int, default=1024, help="queued texts before requests get 503")
+    args = parser.parse_args()
+
+    # Pay the model load before accepting the first request
+    preload_nlp()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.queue_size))
+    except KeyboardInterrupt:
+        pass
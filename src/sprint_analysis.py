@@ -1,43 +1,372 @@
+import numpy as np
 import pandas as pd
 import os
 
+try:
+    from .instrumentation import span
+    from .storage import write_table
+    from .workload_index import add_trend_columns
+except ImportError:
+    from instrumentation import span
+    from storage import write_table
+    from workload_index import add_trend_columns
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SPRINT_FILE = os.path.join(PROJECT_ROOT, "data", "sprint_tasks.csv")
+
+# Rows read per chunk when streaming task exports
+DEFAULT_CHUNKSIZE = 500_000
+
+TASK_COLUMNS = ["sprint", "assignee", "estimated_hours", "actual_hours", "status"]
+TASK_ID_COLUMN = "task_id"
+SPRINT_STAT_COLUMNS = ["first_row", "task_count", "incomplete_count", "estimated_hours", "actual_hours"]
+ASSIGNEE_STAT_COLUMNS = ["task_count", "incomplete_count", "estimated_hours", "actual_hours"]
 
 def load_sprint_data():
-    file_path = os.path.join(PROJECT_ROOT, "data", "sprint_tasks.csv")
-    return pd.read_csv(file_path)
-
-def compute_overload_metrics(df):
-    results = []
-
-    for sprint in df['sprint'].unique():
-        sprint_df = df[df['sprint'] == sprint]
-        total_tasks = len(sprint_df)
-        incomplete_tasks = len(sprint_df[sprint_df['status'] != 'done'])
-        carry_over_rate = incomplete_tasks / total_tasks
-
-        tasks_per_dev = sprint_df.groupby('assignee').size().to_dict()
-        max_tasks = max(tasks_per_dev.values())
-
-        estimated_hours = sprint_df['estimated_hours'].sum()
-        actual_hours = sprint_df['actual_hours'].sum()
-        hours_ratio = actual_hours / max(estimated_hours, 1)
-
-        overload_score = 0.4*carry_over_rate + 0.3*(max_tasks/10) + 0.3*hours_ratio
-        overload_score = min(overload_score, 1.0)
-
-        results.append({
-            "sprint": sprint,
-            "carry_over_rate": round(carry_over_rate,2),
-            "max_tasks_per_dev": max_tasks,
-            "hours_ratio": round(hours_ratio,2),
-            "overload_score": round(overload_score,2)
+    return pd.read_csv(SPRINT_FILE, dtype={"assignee": "category", "status": "category"})
+
+
+class SprintAccumulator:
+    """Per-sprint aggregates of a task table, mergeable across chunks and files.
+
+    `sprints` holds, per sprint, the position of its first task row, the task
+    and incomplete-task counts and the hour sums; `assignees` holds the same
+    counts and sums per (sprint, assignee). Memory grows with the number of sprints
+    and assignees, not with the number of task rows. `rows` is the number of
+    task rows folded in so far. A sprint whose tasks were all retracted
+    keeps its entry, with a task count of 0, so that it keeps its position;
+    `active_sprints()` leaves such sprints out.
+    """
+
+    def __init__(self, sprints=None, assignees=None, rows=0):
+        if sprints is None:
+            sprints = pd.DataFrame(columns=SPRINT_STAT_COLUMNS, index=pd.Index([], name="sprint"))
+        if assignees is None:
+            assignees = pd.DataFrame(
+                {col: pd.Series([], dtype="int64") for col in ASSIGNEE_STAT_COLUMNS},
+                index=pd.MultiIndex.from_arrays([[], []], names=["sprint", "assignee"]),
+            )
+        self.sprints = sprints
+        self.assignees = assignees
+        self.rows = rows
+
+    @classmethod
+    def from_frame(cls, df):
+        # Columns missing from an export, other than sprint, are treated as empty
+        if "sprint" not in df:
+            raise ValueError("sprint task data has no 'sprint' column")
+        if df.empty:
+            return cls(rows=len(df))
+
+        sprint = df["sprint"]
+        by_sprint = df.groupby(sprint, sort=False)
+        zeros = pd.Series(0, index=df.index)
+
+        incomplete = (df["status"] != "done") if "status" in df else zeros
+        sprints = pd.DataFrame({
+            "first_row": pd.Series(np.arange(len(df)), index=df.index).groupby(sprint, sort=False).min(),
+            "task_count": by_sprint.size(),
+            "incomplete_count": incomplete.groupby(sprint, sort=False).sum(),
+            "estimated_hours": df.get("estimated_hours", zeros).groupby(sprint, sort=False).sum(),
+            "actual_hours": df.get("actual_hours", zeros).groupby(sprint, sort=False).sum(),
         })
+        sprints.index.name = "sprint"
+
+        if "assignee" in df:
+            tasks = pd.DataFrame({
+                "task_count": 1,
+                "incomplete_count": incomplete.astype("int64"),
+                "estimated_hours": df.get("estimated_hours", zeros),
+                "actual_hours": df.get("actual_hours", zeros),
+            }, index=df.index)
+            assignees = tasks.groupby([sprint, df["assignee"]], sort=False, observed=True).sum()
+        else:
+            assignees = None
+
+        return cls(sprints, assignees, rows=len(df))
+
+    def merge(self, other):
+        # `other` is taken to follow `self`, so its row positions are shifted
+        if self.sprints.empty:
+            return SprintAccumulator(other.sprints, other.assignees, self.rows + other.rows)
+        if other.sprints.empty:
+            return SprintAccumulator(self.sprints, self.assignees, self.rows + other.rows)
+
+        shifted = other.sprints.assign(first_row=other.sprints["first_row"] + self.rows)
+        sprints = pd.concat([self.sprints, shifted]).groupby(level=0, sort=False).agg({
+            "first_row": "min",
+            "task_count": "sum",
+            "incomplete_count": "sum",
+            "estimated_hours": "sum",
+            "actual_hours": "sum",
+        })
+        assignees = pd.concat([self.assignees, other.assignees]).groupby(level=[0, 1], sort=False).sum()
+        return SprintAccumulator(sprints, assignees, self.rows + other.rows)
+
+    def remove(self, other):
+        # Retracts tasks previously folded in (e.g. superseded task rows).
+        # Row positions are kept, also for sprints left without tasks, so
+        # sprint order is unaffected.
+        if other.sprints.empty:
+            return self
+
+        counts = ["task_count", "incomplete_count", "estimated_hours", "actual_hours"]
+        sprints = self.sprints.copy()
+        sprints[counts] = sprints[counts] - other.sprints[counts].reindex(sprints.index, fill_value=0)
+
+        assignees = self.assignees.sub(other.assignees, fill_value=0)
+        assignees = assignees[assignees["task_count"] > 0]
+        assignees = assignees.astype({"task_count": "int64", "incomplete_count": "int64"})
+        return SprintAccumulator(sprints, assignees, self.rows)
+
+    def subset(self, sprints):
+        keep = self.sprints.index.isin(sprints)
+        keep_assignees = self.assignees.index.get_level_values(0).isin(sprints)
+        return SprintAccumulator(self.sprints[keep], self.assignees[keep_assignees], self.rows)
+
+    def active_sprints(self):
+        # Entries of `sprints` with at least one task
+        return self.sprints[self.sprints["task_count"] > 0]
+
+    def task_counts(self):
+        # Tasks per sprint, sorted by sprint
+        counts = self.active_sprints()["task_count"].astype("int64").sort_index()
+        return counts.reset_index(name="task_count")
+
+    def overload_metrics(self, trends=True):
+        # One row per sprint in order of first appearance; with `trends`, the
+        # rolling and smoothed columns of workload_index.trend_metrics follow
+        stats = self.active_sprints()
+        if stats.empty:
+            return pd.DataFrame()
+
+        with span("sprint.overload_report") as s:
+            stats = stats.sort_values("first_row", kind="stable")
+            max_tasks = self.assignees["task_count"].groupby(level=0, sort=False).max().reindex(stats.index)
+            s.items = len(stats)
+            report = _overload_report(
+                stats.index,
+                stats["task_count"].to_numpy(dtype="int64"),
+                stats["incomplete_count"].to_numpy(dtype="int64"),
+                max_tasks.to_numpy(),
+                stats["estimated_hours"].to_numpy(),
+                stats["actual_hours"].to_numpy(),
+            )
+        if trends:
+            report = add_trend_columns(report, self)
+        return report
 
-    return pd.DataFrame(results)
+
+class TaskStore:
+    """Latest row of every task seen so far, keyed by task_id.
+
+    Rows live in typed arrays grown by half their size at a time: hours as
+    float64, any other column as int32 codes into that column's table of
+    distinct values (sprints, assignees, statuses and requirement ids are
+    few). Integral task ids are their own key and other ids a 64-bit hash
+    of their text. Keys are kept in sorted runs that are merged as they
+    grow, so a lookup is a binary search per run and no chunk copies the
+    store. A task costs about 40 bytes, so unlike SprintAccumulator the
+    store grows with the number of distinct tasks.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.values = {}
+        self.categories = {}
+        self._runs = []
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def keys(ids):
+        # The same id read as 12, 12.0 or "12" is one task
+        numbers = ids if pd.api.types.is_numeric_dtype(ids) else pd.to_numeric(ids, errors="coerce")
+        integral = (numbers.notna() & (numbers % 1 == 0)).to_numpy()
+        keys = np.empty(len(ids), dtype=np.uint64)
+        keys[integral] = numbers[integral].to_numpy(dtype=np.int64).view(np.uint64)
+        if not integral.all():
+            keys[~integral] = pd.util.hash_array(ids[~integral].astype(str).to_numpy(dtype=object))
+        return keys
+
+    def lookup(self, keys):
+        # Slot of every key, -1 for tasks not seen yet
+        slots = np.full(len(keys), -1, dtype=np.int64)
+        for run_keys, run_slots in self._runs:
+            pos = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+            hit = run_keys[pos] == keys
+            slots[hit] = run_slots[pos[hit]]
+        return slots
+
+    def _add_keys(self, keys):
+        slots = np.arange(self.size, self.size + len(keys), dtype=np.int32)
+        if len(keys) == 0:
+            return slots
+        order = np.argsort(keys, kind="stable")
+        self._runs.append((keys[order], slots[order]))
+        # Runs of similar length are merged, so there are O(log n) of them
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= len(self._runs[-1][0]):
+            (k1, s1), (k2, s2) = self._runs.pop(), self._runs.pop()
+            run_keys, run_slots = np.concatenate([k2, k1]), np.concatenate([s2, s1])
+            order = np.argsort(run_keys, kind="stable")
+            self._runs.append((run_keys[order], run_slots[order]))
+        self.size += len(slots)
+        return slots
+
+    def _column(self, col):
+        if col not in self.values:
+            hours = col in ("estimated_hours", "actual_hours")
+            self.values[col] = np.full(len(next(iter(self.values.values()), [])),
+                                       np.nan if hours else -1, dtype=np.float64 if hours else np.int32)
+            if not hours:
+                self.categories[col] = pd.Index([], dtype=object)
+        return self.values[col]
+
+    def _grow(self, size):
+        capacity = len(next(iter(self.values.values()), []))
+        if size > capacity:
+            capacity = max(size, capacity + capacity // 2, 1024)
+            for col, values in self.values.items():
+                grown = np.full(capacity, np.nan if values.dtype.kind == "f" else -1, dtype=values.dtype)
+                grown[:len(values)] = values
+                self.values[col] = grown
+
+    def _codes(self, col, values):
+        values = values.astype(object)
+        new = pd.Index(values.dropna().unique()).difference(self.categories[col], sort=False)
+        if len(new):
+            self.categories[col] = self.categories[col].append(new.astype(object))
+        return self.categories[col].get_indexer(values).astype(np.int32)
+
+    def put(self, frame):
+        # Stores the rows of `frame` (unique task ids) as the latest rows of
+        # their tasks; returns the rows they replace (None if all are new)
+        keys = self.keys(frame[TASK_ID_COLUMN])
+        slots = self.lookup(keys)
+        seen = slots >= 0
+        previous = self.rows(slots[seen]) if seen.any() else None
+        for col in frame.columns.drop(TASK_ID_COLUMN):
+            self._column(col)
+        new_slots = self._add_keys(keys[~seen])
+        self._grow(self.size)
+        slots[~seen] = new_slots
+        for col in self.values:
+            if col not in frame:
+                values = np.nan if self.values[col].dtype.kind == "f" else -1
+            elif col in self.categories:
+                values = self._codes(col, frame[col])
+            else:
+                values = frame[col].to_numpy(dtype=np.float64)
+            self.values[col][slots] = values
+        return previous
+
+    def rows(self, slots, columns=None):
+        # Stored rows at `slots`, as a DataFrame with the original values
+        columns = list(self.values) if columns is None else columns
+        frame = {}
+        for col in columns:
+            values = self.values[col][slots]
+            if col in self.categories:
+                table = np.append(self.categories[col].to_numpy(dtype=object), np.nan)
+                values = pd.Series(table[values]).infer_objects()
+            frame[col] = values
+        return pd.DataFrame(frame)
+
+    def distinct(self, columns):
+        # Distinct value combinations of `columns` (coded columns) among the
+        # stored rows, leaving out rows where one of them is missing
+        if self.size == 0 or any(col not in self.values for col in columns):
+            return pd.DataFrame(columns=columns)
+        codes = np.stack([self.values[col][:self.size] for col in columns], axis=1)
+        codes = np.unique(codes[(codes >= 0).all(axis=1)], axis=0)
+        frame = {}
+        for i, col in enumerate(columns):
+            frame[col] = pd.Series(self.categories[col].to_numpy(dtype=object)[codes[:, i]]).infer_objects()
+        return pd.DataFrame(frame, columns=columns)
+
+
+def fold_task_rows(accumulator, tasks, frame):
+    # Folds one chunk of task rows into `accumulator`. With a task_id column
+    # a task is counted once, by its latest row: a row whose task_id came
+    # earlier (in the chunk, or in `tasks`, the TaskStore of latest rows so
+    # far) retracts that row. Rows without a task id are always counted.
+    # Returns the new accumulator, the store and the retracted rows (None if
+    # there were none).
+    rows = len(frame)
+    previous = None
+    if TASK_ID_COLUMN in frame:
+        # Sprint order follows the file's rows, superseded ones included, so
+        # it does not depend on where chunks start
+        first_rows = pd.Series(np.arange(rows), index=frame.index).groupby(frame["sprint"], sort=False).min()
+        ids = frame[TASK_ID_COLUMN]
+        frame = frame[~(ids.duplicated(keep="last") & ids.notna())]
+        tasks = tasks if tasks is not None else TaskStore()
+        identified = frame[frame[TASK_ID_COLUMN].notna()]
+        if len(identified):
+            previous = tasks.put(identified)
+        if previous is not None:
+            accumulator = accumulator.remove(SprintAccumulator.from_frame(previous))
+
+    added = SprintAccumulator.from_frame(frame)
+    added.rows = rows
+    if TASK_ID_COLUMN in frame and not added.sprints.empty:
+        # Sprints whose only rows here were superseded get an empty entry
+        added.sprints = added.sprints.reindex(first_rows.index, fill_value=0)
+        added.sprints["first_row"] = first_rows.to_numpy()
+    return accumulator.merge(added), tasks, previous
+
+def stream_sprint_data(paths=SPRINT_FILE, chunksize=DEFAULT_CHUNKSIZE, task_updates=False):
+    # Folds one or more task CSVs into a single SprintAccumulator, reading
+    # `chunksize` rows at a time; every row counts as a task. With
+    # `task_updates`, a task_id repeated in a later row (files are taken as
+    # one export, in order) is an update of that task, as in the incremental
+    # updater. That needs a TaskStore, so memory then grows with the number
+    # of distinct tasks.
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    columns = TASK_COLUMNS + [TASK_ID_COLUMN] if task_updates else TASK_COLUMNS
+    accumulator = SprintAccumulator()
+    tasks = None
+    with span("sprint.stream_csv") as s:
+        for path in paths:
+            chunks = pd.read_csv(path, chunksize=chunksize, usecols=lambda col: col in columns)
+            for chunk in chunks:
+                accumulator, tasks, _ = fold_task_rows(accumulator, tasks, chunk)
+        s.items = accumulator.rows
+    return accumulator
+
+def compute_overload_metrics(df, task_updates=False):
+    # One grouped pass over all sprints, in order of first appearance; see
+    # stream_sprint_data for `task_updates`
+    if not task_updates:
+        df = df.drop(columns=TASK_ID_COLUMN, errors="ignore")
+    with span("sprint.aggregate") as s:
+        accumulator, _, _ = fold_task_rows(SprintAccumulator(), None, df)
+        s.items = len(df)
+    return accumulator.overload_metrics()
+
+def overload_score(carry_over_rate, max_tasks, hours_ratio):
+    # Works element-wise on arrays of any shape (e.g. simulated scenarios)
+    return np.minimum(0.4*carry_over_rate + 0.3*(max_tasks/10) + 0.3*hours_ratio, 1.0)
+
+def _overload_report(sprints, total_tasks, incomplete_tasks, max_tasks, estimated_hours, actual_hours):
+    carry_over_rate = incomplete_tasks / total_tasks
+    hours_ratio = actual_hours / np.maximum(estimated_hours, 1)
+    score = overload_score(carry_over_rate, max_tasks, hours_ratio)
+
+    # Rounding mirrors the previous per-sprint version: carry-over was a
+    # Python float (round()), the hour-based values were NumPy floats
+    return pd.DataFrame({
+        "sprint": sprints.to_numpy(),
+        "carry_over_rate": [round(x, 2) for x in carry_over_rate.tolist()],
+        "max_tasks_per_dev": max_tasks,
+        "hours_ratio": np.round(hours_ratio, 2),
+        "overload_score": np.round(score, 2)
+    })
 
 def save_overload_report(df):
     results_file = os.path.join(PROJECT_ROOT, "results", "overload_report.csv")
-    df.to_csv(results_file, index=False)
+    results_file = write_table(df, results_file)
     print(f"Overload report saved at {results_file}")
-
@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .instrumentation import span
+except ImportError:
+    from instrumentation import span
+
+# Result tables are written to a temporary file in the target directory and
+# moved into place, so readers never see a half-written file and concurrent
+# writers cannot interleave.
+#
+# Tables handed between stages (ambiguity, overload and combined reports)
+# are CSV by default. With RISK_STORAGE_FORMAT=parquet they are stored as
+# Parquet instead (same path, .parquet extension), with categorical string
+# columns and downcast numbers, and read back memory-mapped through Arrow.
+# Parquet needs the optional pyarrow package.
+
+STORAGE_FORMAT = os.environ.get("RISK_STORAGE_FORMAT", "csv")
+
+# Low-cardinality string columns stored as categories
+CATEGORICAL_COLUMNS = ["assignee", "status", "risk_level"]
+
+# Read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _temp_file(directory, suffix):
+    # mkstemp creates the file 0600 and os.replace keeps that mode; give it
+    # the mode a plain open() would have
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=suffix)
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return fd, tmp_path
+
+def write_csv_atomic(df, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = _temp_file(directory, ".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet storage needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+def table_path(path, fmt=None):
+    fmt = fmt or STORAGE_FORMAT
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"unknown storage format {fmt!r} (expected 'csv' or 'parquet')")
+    return os.path.splitext(path)[0] + "." + fmt
+
+def compact_dtypes(df):
+    # Categorical strings, smallest integer types, float32 where lossless
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORICAL_COLUMNS and not isinstance(values.dtype, pd.CategoricalDtype):
+            df[col] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            df[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True):
+                df[col] = narrow
+    return df
+
+def write_parquet_atomic(df, path):
+    pa = _pyarrow()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = _temp_file(directory, ".parquet")
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+        pa.parquet.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def write_table(df, path, fmt=None):
+    # Returns the path actually written (extension follows the format)
+    path = table_path(path, fmt)
+    with span("io.write_table", table=os.path.basename(path)) as s:
+        if path.endswith(".parquet"):
+            write_parquet_atomic(df, path)
+        else:
+            write_csv_atomic(df, path)
+        s.items = len(df)
+    return path
+
+def read_table(path, fmt=None, columns=None):
+    path = table_path(path, fmt)
+    with span("io.read_table", table=os.path.basename(path)) as s:
+        if path.endswith(".parquet"):
+            pa = _pyarrow()
+            df = pa.parquet.read_table(path, columns=columns, memory_map=True).to_pandas()
+        else:
+            df = pd.read_csv(path, usecols=columns)
+        s.items = len(df)
+    return df
+
+def table_exists(path, fmt=None):
+    return os.path.exists(table_path(path, fmt))
+
+def export_csv(path):
+    # Writes a CSV copy next to a Parquet table and returns its path
+    csv_path = table_path(path, "csv")
+    write_csv_atomic(read_table(path, "parquet"), csv_path)
+    return csv_path
+
+if __name__ == "__main__":
+    # python storage.py results/overload_report.parquet ...
+    for parquet_file in sys.argv[1:]:
+        print(f"CSV export saved at {export_csv(parquet_file)}")
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+# Seeded generators of realistic-looking inputs for benchmarks: requirement
+# lines in the style of data/requirements.txt and sprint task tables with
+# the columns of data/sprint_tasks.csv. The same seed always gives the same
+# data.
+
+SUBJECTS = ["The system", "The application", "The dashboard", "Each user", "The report",
+            "The administrator", "The API", "The mobile client", "The export job"]
+VERBS = ["should be", "must be", "shall be", "will be", "is expected to be"]
+QUALITIES = ["fast", "easy to use", "simple", "efficient", "user-friendly", "flexible",
+             "available 99.9% of the time", "generated within 2 seconds", "secure", "robust",
+             "accessible from any browser"]
+TAILS = ["", " for all users", " when files are uploaded", " according to the acceptance criteria",
+         " after the data is validated by the administrator", " during peak load",
+         " and the results must be stored for 30 days"]
+FOLLOW_UPS = ["", "", " Errors are reported to the user.", " Changes are logged by the audit service.",
+              " It should improve over time."]
+
+# Story-point style estimates, in hours
+ESTIMATES = np.array([1, 2, 3, 5, 8, 13])
+STATUSES = np.array(["done", "in-progress", "todo"])
+
+def make_requirements(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(QUALITIES)}"
+        f"{rng.choice(TAILS)}.{rng.choice(FOLLOW_UPS)}\n"
+        for _ in range(n)
+    ]
+
+def make_sprint_tasks(n_rows, n_sprints, n_assignees=50, seed=42):
+    # Tasks are spread over sprints in order; assignee load is skewed (a few
+    # people carry much of the work), actual hours scatter around estimates,
+    # and the most recent sprints have more unfinished work
+    rng = np.random.default_rng(seed)
+
+    sprint = np.sort(rng.integers(1, n_sprints + 1, n_rows))
+    assignee_weights = 1.0 / np.arange(1, n_assignees + 1)
+    assignee_weights /= assignee_weights.sum()
+    assignee = rng.choice(n_assignees, n_rows, p=assignee_weights)
+
+    estimated = rng.choice(ESTIMATES, n_rows)
+    actual = np.maximum(np.round(estimated * rng.lognormal(0.05, 0.3, n_rows)), 0).astype(int)
+
+    recency = sprint / n_sprints
+    p_done = np.clip(0.95 - 0.5 * recency ** 4, 0, 1)
+    roll = rng.random(n_rows)
+    status = np.where(roll < p_done, 0, np.where(roll < p_done + (1 - p_done) / 2, 1, 2))
+
+    return pd.DataFrame({
+        "task_id": np.arange(1, n_rows + 1),
+        "sprint": sprint,
+        "assignee": pd.Categorical.from_codes(assignee, [f"dev{i}" for i in range(n_assignees)]).astype(str),
+        "estimated_hours": estimated,
+        "actual_hours": actual,
+        "status": STATUSES[status],
+    })
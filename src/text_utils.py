@@ -0,0 +1,68 @@
+import re
+
+# Shared lexicon of vague requirement terms, used by both the per-requirement
+# metrics (requirement_analysis) and the spec-level score (combined_data).
+# Entries may be multi-word phrases.
+VAGUE_TERMS = [
+    "fast", "quick", "easy", "simple", "efficient", "user-friendly",
+    "flexible", "optimize", "improve", "secure", "robust",
+]
+
+def normalise_term(term):
+    return " ".join(term.lower().split())
+
+def load_lexicon(path):
+    # One term or phrase per line; blank lines and '#' comments are skipped
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def _trie_pattern(node):
+    # Turns a character trie into a regex whose alternations share prefixes,
+    # so matching cost grows with term length rather than lexicon size
+    branches = []
+    for char in sorted(key for key in node if key):
+        token = r"\s+" if char == " " else re.escape(char)
+        branches.append(token + _trie_pattern(node[char]))
+
+    if not branches:
+        return ""
+    optional = "" in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+
+class VagueTermMatcher:
+    """Whole-word matcher for a lexicon of vague terms and phrases.
+
+    The lexicon is compiled once into a single case-insensitive regex, so
+    a text is scanned in one pass. Terms only match on word boundaries
+    ("fast" does not match "breakfast"), the longest term wins when several
+    start at the same position, and any run of whitespace matches the
+    spaces inside a phrase.
+    """
+
+    def __init__(self, terms=VAGUE_TERMS):
+        self.terms = sorted({normalise_term(t) for t in terms if t.strip()})
+
+        trie = {}
+        for term in self.terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        body = _trie_pattern(trie) if self.terms else r"(?!)"
+        self.pattern = re.compile(r"(?<!\w)" + body + r"(?!\w)", re.IGNORECASE)
+
+    def findall(self, text):
+        return [normalise_term(m.group(0)) for m in self.pattern.finditer(text)]
+
+    def count(self, text):
+        return sum(1 for _ in self.pattern.finditer(text))
+
+
+DEFAULT_MATCHER = VagueTermMatcher(VAGUE_TERMS)
+
+def count_vague_terms(text, matcher=DEFAULT_MATCHER):
+    return matcher.count(text)
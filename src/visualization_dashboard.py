@@ -1,42 +1,228 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 import os
 
+try:
+    from .hybrid_risk_model import assess_risk
+    from .storage import read_table
+except ImportError:
+    from hybrid_risk_model import assess_risk
+    from storage import read_table
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 def load_combined_data():
     file_path = os.path.join(PROJECT_ROOT, "results", "combined_risk_data.csv")
-    return pd.read_csv(file_path)
+    return read_table(file_path)
+
+RECOMMENDATIONS = {"High": "Immediate Action Required", "Medium": "Review Soon"}
+
+def risk_summary(df):
+    # Headline numbers shown at the top of the dashboards
+    counts = df["risk_level"].value_counts()
+    high = int(counts.get("High", 0))
+    medium = int(counts.get("Medium", 0))
+    low = int(counts.get("Low", 0))
+    total = len(df)
+    risk_score = round((high*1 + medium*0.5) / total * 100, 2) if total else 0.0
+    return {"total": total, "high": high, "medium": medium, "low": low, "risk_score": risk_score}
+
+def recommendations(df):
+    recs = df["risk_level"].astype(str).map(RECOMMENDATIONS).fillna("Monitor")
+    return pd.DataFrame({"sprint": df["sprint"], "risk_level": df["risk_level"], "recommendation": recs})
+
+RISK_LEVELS = ["High", "Medium", "Low"]
+
+# Sort keys offered by the sprint tables: (column, ascending)
+SPRINT_SORTS = {
+    "Risk (highest first)": ("risk_score", False),
+    "Sprint": ("sprint", True),
+    "Overload score": ("overload_score", False),
+    "Ambiguity score": ("ambiguity_score", False),
+}
+
+def sprint_table(df):
+    # Per-sprint rows for the dashboards, with the hybrid score and the
+    # recommendation added once so filtering, sorting and paging are plain
+    # frame slicing. The score is the one predict_risk gave with the risk
+    # level; tables written before it had one are scored here, from the same
+    # model as their levels.
+    table = df.copy()
+    if "risk_score" not in table:
+        score, _ = assess_risk(table["ambiguity_score"], table["overload_score"])
+        table["risk_score"] = np.round(score, 4)
+    table["recommendation"] = recommendations(table)["recommendation"].to_numpy()
+    return table
+
+def filter_sprints(table, levels=None, sort="Risk (highest first)"):
+    if levels is not None:
+        table = table[table["risk_level"].astype(str).isin(levels)]
+    column, ascending = SPRINT_SORTS[sort]
+    # Stable sort, so ties keep sprint order
+    return table.sort_values(column, ascending=ascending, kind="stable")
+
+def sprint_page(table, page, page_size):
+    # Rows of the 1-based `page` (clamped to the last page) and the page count
+    pages = max(-(-len(table) // page_size), 1)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return table.iloc[start:start + page_size], pages
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the
+    # visual shape of the (x, y) line; first and last points are always kept
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average (or the last point) is the third vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+def downsample(df, x, columns, max_points=1000):
+    # Rows picked by LTTB on each column (union of the picks), in x order;
+    # frames with at most max_points rows are returned unchanged
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values(x, kind="stable")
+    per_column = max(max_points // len(columns), 3)
+    # Rows are evenly spaced along the chart whatever their x values (sprint
+    # ids such as "S12" included), so LTTB runs on row positions
+    positions = np.arange(len(df))
+    keep = np.unique(np.concatenate([lttb(positions, df[col], per_column) for col in columns]))
+    return df.iloc[keep]
+
+# Plotting libraries are only needed for the plots below, so they are
+# imported lazily. The drawing helpers take the axes to draw on and are
+# shared by the interactive dashboard and the headless report mode.
+
+REPORT_TABLE_ROWS = 25
+
+_style_ready = False
+
+def setup_style():
+    # Seaborn theme, applied once per process
+    global _style_ready
+    if not _style_ready:
+        import seaborn as sns
+        sns.set(style="whitegrid")
+        _style_ready = True
+
+def draw_score_trend(ax, df):
+    # Long histories are downsampled to what the chart can actually show
+    series = downsample(df, "sprint", ["ambiguity_score", "overload_score"])
+    ax.plot(series['sprint'], series['ambiguity_score'], marker='o', label='Ambiguity Score', color='blue')
+    ax.plot(series['sprint'], series['overload_score'], marker='o', label='Overload Score', color='green')
+    ax.set_xlabel("Sprint")
+    ax.set_ylabel("Score")
+    ax.set_title("Requirement Ambiguity & Sprint Overload per Sprint")
+    ax.legend()
+
+def draw_risk_distribution(ax, df):
+    import seaborn as sns
+
+    counts = df["risk_level"].astype(str).value_counts()
+    order = [level for level in reversed(RISK_LEVELS) if level in counts.index]
+    ax.bar(order, counts.reindex(order).to_numpy(), color=sns.color_palette("Reds", len(RISK_LEVELS))[:len(order)])
+    ax.set_xlabel("risk_level")
+    ax.set_ylabel("count")
+    ax.set_title("Hybrid Risk Level Distribution")
+
+def draw_recommendations(ax, df, max_rows=REPORT_TABLE_ROWS):
+    # Highest-risk sprints first; the full list goes to recommendations.csv.
+    # Drawn as one monospaced text block: a matplotlib table lays out every
+    # cell separately and dominated render time.
+    top = filter_sprints(sprint_table(df)).head(max_rows)
+    ax.axis("off")
+    ax.set_title(f"Recommendations (top {len(top)} of {len(df)} sprints by risk)")
+    if len(top):
+        text = top[["sprint", "risk_level", "risk_score", "recommendation"]].to_string(index=False)
+        ax.text(0, 1, text, family="monospace", fontsize=8, va="top", transform=ax.transAxes)
 
 def plot_risk_dashboard(df):
-    sns.set(style="whitegrid")
+    import matplotlib.pyplot as plt
+
+    setup_style()
     
     # Plot Ambiguity & Overload per sprint
     fig, ax1 = plt.subplots(figsize=(10,5))
-    
-    ax1.plot(df['sprint'], df['ambiguity_score'], marker='o', label='Ambiguity Score', color='blue')
-    ax1.plot(df['sprint'], df['overload_score'], marker='o', label='Overload Score', color='green')
-    ax1.set_xlabel("Sprint")
-    ax1.set_ylabel("Score")
-    ax1.set_title("Requirement Ambiguity & Sprint Overload per Sprint")
-    ax1.legend()
+    draw_score_trend(ax1, df)
     
     plt.tight_layout()
     plt.show()
     
     # Plot risk level counts
-    plt.figure(figsize=(6,4))
-    sns.countplot(x='risk_level', data=df, palette='Reds')
-    plt.title("Hybrid Risk Level Distribution")
+    fig, ax2 = plt.subplots(figsize=(6,4))
+    draw_risk_distribution(ax2, df)
     plt.show()
     
     # Print recommendations
     print("\n=== Recommendations ===")
-    for i, row in df.iterrows():
-        rec = "Monitor"
-        if row['risk_level'] == "High":
-            rec = "Immediate Action Required"
-        elif row['risk_level'] == "Medium":
-            rec = "Review Soon"
-        print(f"Sprint {row['sprint']}: Risk={row['risk_level']} → {rec}")
+    recs = recommendations(df)
+    lines = ("Sprint " + recs["sprint"].astype(str) + ": Risk=" + recs["risk_level"].astype(str)
+             + " → " + recs["recommendation"])
+    print("\n".join(lines))
+
+_report_figure = None
+
+def report_figure():
+    # One A4-portrait figure per process, cleared and redrawn for every
+    # report. Built on matplotlib's object API with the Agg canvas, so no GUI
+    # backend or pyplot state is involved.
+    global _report_figure
+    if _report_figure is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        setup_style()
+        # Fixed margins instead of tight_layout(), which costs an extra draw
+        fig = Figure(figsize=(8.27, 11.69))
+        fig.subplots_adjust(left=0.1, right=0.95, top=0.93, bottom=0.04)
+        FigureCanvasAgg(fig)
+        _report_figure = fig
+    return _report_figure
+
+def render_report(df, output_dir, formats=("png",), title=None):
+    # Headless risk pack: trend, distribution and recommendations on one page
+    # per format (report.png, report.pdf, ...) plus recommendations.csv.
+    # Returns the paths written.
+    try:
+        from .storage import write_csv_atomic
+    except ImportError:
+        from storage import write_csv_atomic
+
+    os.makedirs(output_dir, exist_ok=True)
+    fig = report_figure()
+    fig.clf()
+    trend_ax, dist_ax, table_ax = fig.subplots(3, 1, gridspec_kw={"height_ratios": [3, 2, 4], "hspace": 0.5})
+    draw_score_trend(trend_ax, df)
+    draw_risk_distribution(dist_ax, df)
+    draw_recommendations(table_ax, df)
+    if title:
+        fig.suptitle(title, fontweight="bold")
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"report.{fmt}")
+        fig.savefig(path, format=fmt, dpi=100)
+        paths.append(path)
+
+    recs_file = os.path.join(output_dir, "recommendations.csv")
+    write_csv_atomic(recommendations(df), recs_file)
+    paths.append(recs_file)
+    return paths
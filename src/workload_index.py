@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .instrumentation import span
+except ImportError:
+    from instrumentation import span
+
+# Sprint x assignee workload index for trend queries. Sprints are numbered
+# in order of first appearance (as in the overload report). Only the
+# (sprint, assignee) pairs that have tasks are stored, sorted by assignee
+# and then by sprint, with a running total of every field along that order.
+# One assignee's entries for a run of consecutive sprints are therefore
+# adjacent: their sum is the difference of the running totals at the two
+# ends of the run, found by binary search. A rolling-window or per-person
+# query costs O(log n) per cell, whatever the length of the history.
+#
+# "The last k sprints" means the last k sprints present in the data, the
+# current one included. Memory grows with the number of (sprint, assignee)
+# pairs that have tasks, about 40 bytes each, and never with sprints x
+# assignees: a report of 10,000 sprints with 20 people each is about 8 MB
+# however many people there are overall.
+
+TREND_WINDOW = 3
+EWMA_SPAN = 3
+
+FIELDS = ["task_count", "incomplete_count", "estimated_hours", "actual_hours"]
+TREND_COLUMNS = ["carry_over_rate_rolling", "hours_ratio_rolling", "hours_ratio_ewma",
+                 "max_dev_tasks_window"]
+
+
+def _rolling_diff(cumulative, k):
+    # `cumulative` starts with a zero row; result row i sums the rows of
+    # sprints max(i - k + 1, 0) .. i
+    stop = np.arange(1, len(cumulative))
+    start = np.maximum(stop - k, 0)
+    return cumulative[stop] - cumulative[start]
+
+def _ratio(actual, estimated):
+    return actual / np.maximum(estimated, 1)
+
+
+class WorkloadIndex:
+    """Sparse sprint x assignee workload with window sums by binary search.
+
+    `keys` holds one sorted int64 key per (sprint, assignee) pair with tasks,
+    `assignee position * (number of sprints + 1) + sprint position`. For
+    every field in FIELDS, `cumulative[field]` has one entry more than
+    `keys`: entry i is the total over the pairs before key i, so the sum
+    over the pairs with keys in [a, b) is the difference of the entries at
+    their searchsorted positions. `team` holds the per-sprint prefix sums
+    over all tasks, with or without assignee.
+    """
+
+    def __init__(self, sprints, assignees, keys, cumulative, team):
+        self.sprints = sprints
+        self.assignees = assignees
+        self.keys = keys
+        self.cumulative = cumulative
+        self.team = team
+        self._positions = pd.Series(np.arange(len(sprints)), index=sprints)
+        self._columns = pd.Series(np.arange(len(assignees)), index=assignees)
+
+    @classmethod
+    def from_accumulator(cls, accumulator):
+        stats = accumulator.active_sprints().sort_values("first_row", kind="stable")
+        sprints = stats.index
+        entries = accumulator.assignees
+        rows = sprints.get_indexer(entries.index.get_level_values(0))
+        entries = entries[rows >= 0]
+        rows = rows[rows >= 0]
+        cols, assignees = pd.factorize(entries.index.get_level_values(1), sort=True)
+
+        keys = cols.astype(np.int64) * (len(sprints) + 1) + rows
+        order = np.argsort(keys, kind="stable")
+        cumulative = {}
+        for field in FIELDS:
+            dtype = np.int64 if field.endswith("_count") else np.float64
+            values = entries[field].to_numpy(dtype=dtype)[order]
+            cumulative[field] = np.concatenate([np.zeros(1, dtype=dtype), np.cumsum(values)])
+
+        team = {field: np.concatenate([[0], np.cumsum(stats[field].to_numpy(dtype=np.float64))])
+                for field in FIELDS}
+        return cls(sprints, pd.Index(np.asarray(assignees), name="assignee"), keys[order], cumulative, team)
+
+    def _bounds(self, k, end):
+        # Sprint positions [start, stop) of the last k sprints up to and
+        # including `end`
+        stop = len(self.sprints) if end is None else int(self._positions[end]) + 1
+        return max(stop - k, 0), stop
+
+    def _sum(self, field, cols, start, stop):
+        # Sums of `field` over sprint positions [start, stop) of the assignees
+        # at positions `cols` (arrays broadcast together)
+        base = np.asarray(cols, dtype=np.int64) * (len(self.sprints) + 1)
+        cells = self.cumulative[field]
+        return cells[np.searchsorted(self.keys, base + stop)] - cells[np.searchsorted(self.keys, base + start)]
+
+    def window(self, field, k, end=None, assignee=None):
+        # Sum of `field` over the last k sprints up to `end` (default: the
+        # latest sprint): a Series over assignees, or one assignee's number
+        start, stop = self._bounds(k, end)
+        if assignee is None:
+            return pd.Series(self._sum(field, np.arange(len(self.assignees)), start, stop),
+                             index=self.assignees, name=field)
+        return self._sum(field, self._columns[assignee], start, stop)
+
+    def team_window(self, field, k, end=None):
+        start, stop = self._bounds(k, end)
+        return self.team[field][stop] - self.team[field][start]
+
+    def rolling(self, field, k, assignee=None):
+        # Window sums ending at every sprint: sprints x assignees, or one
+        # assignee's column as a Series
+        stop = np.arange(1, len(self.sprints) + 1)
+        start = np.maximum(stop - k, 0)
+        if assignee is not None:
+            return pd.Series(self._sum(field, self._columns[assignee], start, stop), index=self.sprints, name=field)
+        cols = np.arange(len(self.assignees))
+        return pd.DataFrame(self._sum(field, cols[None, :], start[:, None], stop[:, None]),
+                            index=self.sprints, columns=self.assignees)
+
+    def team_rolling(self, field, k):
+        return pd.Series(_rolling_diff(self.team[field], k), index=self.sprints, name=field)
+
+    def max_rolling(self, field, k):
+        # Largest per-assignee window sum at every sprint (NaN without
+        # assignees). Only windows holding at least one stored pair can be
+        # nonzero: those ending 0 .. k-1 sprints after a pair's sprint.
+        if len(self.assignees) == 0:
+            return pd.Series(np.nan, index=self.sprints, name=field)
+        n = len(self.sprints)
+        cols, rows = np.divmod(self.keys, n + 1)
+        result = np.zeros(n, dtype=self.cumulative[field].dtype)
+        for offset in range(min(k, n)):
+            last = rows + offset
+            inside = last < n
+            sums = self._sum(field, cols[inside], np.maximum(last[inside] + 1 - k, 0), last[inside] + 1)
+            np.maximum.at(result, last[inside], sums)
+        return pd.Series(result, index=self.sprints, name=field)
+
+    def person_trend(self, assignee, k=TREND_WINDOW, ewma_span=EWMA_SPAN):
+        # One person's load per sprint and over the last k sprints
+        tasks = self.rolling("task_count", 1, assignee)
+        estimated = self.rolling("estimated_hours", 1, assignee)
+        actual = self.rolling("actual_hours", 1, assignee)
+        tasks_rolling = self.rolling("task_count", k, assignee)
+        incomplete_rolling = self.rolling("incomplete_count", k, assignee)
+        hours_ratio = _ratio(actual, estimated)
+        return pd.DataFrame({
+            "task_count": tasks,
+            "tasks_rolling": tasks_rolling,
+            "carry_over_rate_rolling": incomplete_rolling / tasks_rolling.where(tasks_rolling > 0),
+            "hours_ratio": hours_ratio,
+            "hours_ratio_ewma": hours_ratio.ewm(span=ewma_span, adjust=False).mean(),
+        })
+
+    def trend_metrics(self, k=TREND_WINDOW, ewma_span=EWMA_SPAN):
+        # Team-level trend columns per sprint, indexed by sprint.
+        # max_dev_tasks_window is the largest number of tasks one person
+        # had over the last k sprints together.
+        tasks = self.team_rolling("task_count", k)
+        incomplete = self.team_rolling("incomplete_count", k)
+        estimated = self.team_rolling("estimated_hours", k)
+        actual = self.team_rolling("actual_hours", k)
+        hours_ratio = _ratio(self.team_rolling("actual_hours", 1), self.team_rolling("estimated_hours", 1))
+        return pd.DataFrame({
+            "carry_over_rate_rolling": np.round(incomplete / tasks, 2),
+            "hours_ratio_rolling": np.round(_ratio(actual, estimated), 2),
+            "hours_ratio_ewma": np.round(hours_ratio.ewm(span=ewma_span, adjust=False).mean(), 2),
+            "max_dev_tasks_window": self.max_rolling("task_count", k),
+        })
+
+
+def add_trend_columns(report, accumulator, k=TREND_WINDOW, ewma_span=EWMA_SPAN):
+    # Appends (or refreshes) the trend columns of an overload report from
+    # the accumulator covering all of its sprints
+    with span("sprint.trends") as s:
+        trends = WorkloadIndex.from_accumulator(accumulator).trend_metrics(k, ewma_span)
+        s.items = len(trends)
+    report = report.drop(columns=TREND_COLUMNS, errors="ignore")
+    return report.join(trends, on="sprint")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules in src/ import each other as top-level modules, as they do
+# when the run_* scripts are started from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
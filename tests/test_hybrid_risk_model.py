@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import hybrid_risk_model
+import risk_simulation
+from risk_model import RiskModel
+from synthetic_data import make_sprint_tasks
+from visualization_dashboard import filter_sprints, sprint_table
+
+
+@pytest.fixture
+def trained(monkeypatch):
+    # A model that calls sprints High on overload alone, against the rules'
+    # weight on ambiguity
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame({"ambiguity_score": rng.random(3000), "overload_score": rng.random(3000)})
+    history["risk_outcome"] = np.where(history["overload_score"] > 0.6, "High",
+                                       np.where(history["overload_score"] > 0.3, "Medium", "Low"))
+    model = RiskModel(features=["ambiguity_score", "overload_score"], learning_rate=0.05, epochs=5)
+    model.partial_fit(history)
+    monkeypatch.setattr(hybrid_risk_model, "load_trained_model", lambda: model)
+    monkeypatch.setattr(risk_simulation, "load_trained_model", lambda: model)
+    return model
+
+
+def test_scores_come_from_the_trained_model(trained):
+    combined = pd.DataFrame({"sprint": [1, 2, 3], "ambiguity_score": [0.9, 0.1, 0.5],
+                             "overload_score": [0.1, 0.9, 0.5]})
+    scored = hybrid_risk_model.predict_risk(combined)
+    proba = trained.predict_proba(combined)
+    np.testing.assert_allclose(scored["risk_score"], np.round(proba[:, 2] + 0.5 * proba[:, 1], 4))
+    assert scored["risk_level"].tolist() == ["Low", "High", "Medium"]
+
+    table = filter_sprints(sprint_table(scored))
+    assert table["sprint"].tolist() == [2, 3, 1]
+
+    score, levels = hybrid_risk_model.assess_risk(combined["ambiguity_score"], combined["overload_score"])
+    np.testing.assert_allclose(np.round(score, 4), scored["risk_score"])
+    assert levels.tolist() == scored["risk_level"].tolist()
+
+
+def test_what_if_levels_come_from_the_trained_model(trained):
+    tasks = make_sprint_tasks(400, 4)
+    error_model = risk_simulation.EstimateErrorModel.fit(tasks)
+    plan = tasks[tasks["sprint"] == 4]
+    calm = risk_simulation.simulate_sprints(plan, error_model, ambiguity_score=0.0, n_scenarios=500)
+    vague = risk_simulation.simulate_sprints(plan, error_model, ambiguity_score=1.0, n_scenarios=500)
+    # The rules would raise the risk with ambiguity; this model ignores it
+    assert abs(vague["p_high"].iloc[0] - calm["p_high"].iloc[0]) < 0.1
+    assert np.isclose(calm[["p_high", "p_medium", "p_low"]].sum(axis=1), 1).all()
@@ -0,0 +1,14 @@
+import asyncio
+import json
+
+from scoring_service import MicroBatcher, ScoringService
+
+
+def test_requests_larger_than_the_queue_get_413():
+    async def post(texts):
+        service = ScoringService(MicroBatcher(queue_size=2))
+        return await service.dispatch("POST", "/ambiguity", json.dumps({"texts": texts}).encode())
+
+    status, result = asyncio.run(post(["a", "b", "c"]))
+    assert status == 413
+    assert "at most 2 texts" in result["error"]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark_sprint_analysis import reference_overload_metrics
+from incremental_sprint_analysis import update_state
+from sprint_analysis import compute_overload_metrics, stream_sprint_data
+from synthetic_data import STATUSES, make_sprint_tasks
+
+
+def write_tasks(tmp_path, df, name="sprint_tasks.csv"):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def shuffled_tasks_with_updates(n_rows=2000, n_sprints=40, n_updates=400, seed=7):
+    # Synthetic tasks in random order, with extra rows for some task ids that
+    # move them to other sprints and states; the last row of a task_id is
+    # its current state
+    rng = np.random.default_rng(seed)
+    tasks = make_sprint_tasks(n_rows, n_sprints, seed=seed)
+    updates = tasks.sample(n_updates, random_state=seed).copy()
+    updates["sprint"] = rng.integers(1, n_sprints + 1, n_updates)
+    updates["status"] = rng.choice(STATUSES, n_updates)
+    updates["actual_hours"] += rng.integers(0, 3, n_updates)
+    return pd.concat([tasks, updates]).sample(frac=1, random_state=seed, ignore_index=True)
+
+
+def test_grouped_metrics_match_the_reference_loop():
+    df = shuffled_tasks_with_updates()
+    expected = reference_overload_metrics(df)
+    actual = compute_overload_metrics(df)
+    # The trend columns have no counterpart in the original loop
+    pd.testing.assert_frame_equal(actual[expected.columns], expected)
+
+
+def test_task_updates_match_the_reference_loop_on_the_latest_rows():
+    df = shuffled_tasks_with_updates()
+    latest = df.drop_duplicates("task_id", keep="last")
+    expected = reference_overload_metrics(latest).sort_values("sprint", ignore_index=True)
+    actual = compute_overload_metrics(df, task_updates=True)
+    pd.testing.assert_frame_equal(actual[expected.columns].sort_values("sprint", ignore_index=True), expected)
+
+
+@pytest.mark.parametrize("task_updates", [False, True])
+@pytest.mark.parametrize("chunksize", [13, 97, 500])
+def test_chunked_metrics_match_the_full_frame(tmp_path, chunksize, task_updates):
+    df = shuffled_tasks_with_updates()
+    path = write_tasks(tmp_path, df)
+    chunked = stream_sprint_data(path, chunksize=chunksize, task_updates=task_updates)
+    pd.testing.assert_frame_equal(chunked.overload_metrics(), compute_overload_metrics(df, task_updates=task_updates))
+
+
+def test_incremental_updates_match_a_rebuild(tmp_path):
+    df = shuffled_tasks_with_updates()
+    path = tmp_path / "sprint_tasks.csv"
+    state_file = str(tmp_path / "state.pkl")
+    df.iloc[:500].to_csv(path, index=False)
+    update_state(str(path), state_file)
+    for start in range(500, len(df), 450):
+        df.iloc[start:start + 450].to_csv(path, mode="a", header=False, index=False)
+        state, _ = update_state(str(path), state_file)
+
+    rebuilt, _ = update_state(str(path), str(tmp_path / "rebuilt.pkl"), rebuild=True)
+    incremental = state["accumulator"].overload_metrics()
+    pd.testing.assert_frame_equal(incremental, rebuilt["accumulator"].overload_metrics())
+    pd.testing.assert_frame_equal(incremental, compute_overload_metrics(df, task_updates=True))
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3])
+def test_sprint_emptied_by_an_update_keeps_its_position(tmp_path, chunksize):
+    # Task 1 moves from X to Y, then X gets a new task: X still comes first
+    df = pd.DataFrame({
+        "task_id": [1, 1, 2],
+        "sprint": ["X", "Y", "X"],
+        "assignee": ["a", "a", "b"],
+        "estimated_hours": [1, 2, 3],
+        "actual_hours": [1, 2, 3],
+        "status": ["done", "done", "todo"],
+    })
+    full = compute_overload_metrics(df, task_updates=True)
+    assert full["sprint"].tolist() == ["X", "Y"]
+
+    path = write_tasks(tmp_path, df)
+    chunked = stream_sprint_data(path, chunksize=chunksize, task_updates=True).overload_metrics()
+    pd.testing.assert_frame_equal(chunked, full)
+
+
+def test_rebuild_reads_a_last_row_without_newline(tmp_path):
+    path = tmp_path / "sprint_tasks.csv"
+    path.write_text("task_id,sprint,assignee,estimated_hours,actual_hours,status\n"
+                    "1,1,a,2,3,done\n"
+                    "2,2,b,2,1,todo")
+    state, _ = update_state(str(path), str(tmp_path / "state.pkl"), rebuild=True)
+    full = stream_sprint_data(str(path), task_updates=True)
+    pd.testing.assert_frame_equal(state["accumulator"].overload_metrics(), full.overload_metrics())
+    assert len(full.overload_metrics()) == 2
+
+
+def test_incremental_waits_for_an_unterminated_row_until_the_file_settles(tmp_path):
+    path = tmp_path / "sprint_tasks.csv"
+    state_file = str(tmp_path / "state.pkl")
+    path.write_text("task_id,sprint,assignee,estimated_hours,actual_hours,status\n1,1,a,2,3,done\n")
+    update_state(str(path), state_file)
+
+    with open(path, "a") as f:
+        f.write("2,2,b,2,1,todo")
+    state, affected = update_state(str(path), state_file)
+    assert affected == set()
+
+    # Unchanged since the last run: the row is complete
+    state, affected = update_state(str(path), state_file)
+    assert affected == {2}
+    pd.testing.assert_frame_equal(state["accumulator"].overload_metrics(),
+                                  stream_sprint_data(str(path), task_updates=True).overload_metrics())
+
+
+def test_repeated_task_ids_count_as_updates_only_when_asked(tmp_path):
+    df = pd.DataFrame({"task_id": [1, 1, 2], "sprint": [1, 1, 1], "assignee": ["a", "a", "b"],
+                       "estimated_hours": [2, 2, 2], "actual_hours": [1, 3, 2], "status": ["todo", "done", "done"]})
+    path = write_tasks(tmp_path, df)
+    assert stream_sprint_data(path).task_counts()["task_count"].tolist() == [3]
+    assert stream_sprint_data(path, task_updates=True).task_counts()["task_count"].tolist() == [2]
+    report = compute_overload_metrics(df, task_updates=True)
+    assert report["carry_over_rate"].tolist() == [0.0]
@@ -0,0 +1,11 @@
+import os
+
+import pandas as pd
+
+import storage
+
+
+def test_written_tables_follow_the_umask(tmp_path):
+    path = str(tmp_path / "report.csv")
+    storage.write_csv_atomic(pd.DataFrame({"sprint": [1]}), path)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~storage._UMASK
@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+
+from visualization_dashboard import downsample
+
+
+def test_downsample_keeps_string_sprint_ids():
+    n = 1500
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"sprint": [f"S{i:04d}" for i in range(n)],
+                       "ambiguity_score": rng.random(n), "overload_score": rng.random(n)})
+    sampled = downsample(df, "sprint", ["ambiguity_score", "overload_score"], max_points=100)
+    assert 3 <= len(sampled) <= 100
+    assert sampled["sprint"].iloc[0] == "S0000" and sampled["sprint"].iloc[-1] == "S1499"
+    assert sampled["sprint"].is_monotonic_increasing